@@ -0,0 +1,52 @@
+"""move long post content out of line
+
+Content longer than PREVIEW_CHARS moves to post_bodies and posts.content
+keeps a preview, flagged by posts.content_truncated.
+
+Revision ID: 3a8f6c1e2b57
+Revises: e7b9d2f4a613
+Create Date: 2026-10-19 19:20:44.190215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8f6c1e2b57'
+down_revision: Union[str, None] = 'e7b9d2f4a613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Matches the POST_PREVIEW_CHARS default; later changes only affect new posts.
+PREVIEW_CHARS = 500
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('content_truncated', sa.Boolean(),
+                                     server_default=sa.text('false'), nullable=False))
+    op.create_table('post_bodies',
+                    sa.Column('post_id', sa.Integer(), nullable=False),
+                    sa.Column('content', sa.String(), nullable=False),
+                    sa.PrimaryKeyConstraint('post_id'))
+    op.execute(f"""
+        INSERT INTO post_bodies (post_id, content)
+        SELECT id, content FROM posts WHERE length(content) > {PREVIEW_CHARS}
+    """)
+    op.execute(f"""
+        UPDATE posts SET content = left(content, {PREVIEW_CHARS}), content_truncated = true
+        WHERE length(content) > {PREVIEW_CHARS}
+    """)
+    pass
+
+
+def downgrade():
+    op.execute("""
+        UPDATE posts SET content = b.content, content_truncated = false
+        FROM post_bodies b WHERE b.post_id = posts.id
+    """)
+    op.drop_table('post_bodies')
+    op.drop_column('posts', 'content_truncated')
+    pass
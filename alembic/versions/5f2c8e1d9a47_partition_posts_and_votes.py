@@ -0,0 +1,133 @@
+"""partition posts and votes
+
+Range-partitions posts by created_at (one partition per month plus a
+default partition) and hash-partitions votes by post_id.
+
+Postgres requires the primary key of a partitioned table to contain the
+partition key, so posts' primary key becomes (id, created_at) and the
+votes -> posts foreign key (which needs a unique index on posts.id alone)
+is dropped. Removing a post's votes is done by the application instead.
+
+Rows are copied inside the migration transaction; on very large tables run
+this during a maintenance window.
+
+Revision ID: 5f2c8e1d9a47
+Revises: a53e3a5ad1c4
+Create Date: 2026-10-19 17:05:12.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c8e1d9a47'
+down_revision: Union[str, None] = 'a53e3a5ad1c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Number of hash partitions for votes. Changing it later means re-partitioning.
+VOTE_PARTITIONS = 16
+# Monthly post partitions created ahead of now; scripts/archive_posts.py keeps
+# extending this window.
+MONTHS_AHEAD = 3
+
+
+def upgrade():
+    op.execute("ALTER TABLE votes DROP CONSTRAINT IF EXISTS votes_post_id_fkey")
+
+    # posts: RANGE (created_at)
+    op.execute("ALTER TABLE posts RENAME TO posts_unpartitioned")
+    op.execute("ALTER TABLE posts_unpartitioned RENAME CONSTRAINT posts_pkey TO posts_unpartitioned_pkey")
+    op.execute("ALTER TABLE posts_unpartitioned RENAME CONSTRAINT post_users_fk TO posts_unpartitioned_users_fk")
+    op.execute("""
+        CREATE TABLE posts (
+            id integer NOT NULL DEFAULT nextval('posts_id_seq'),
+            title varchar NOT NULL,
+            content varchar NOT NULL,
+            owner_id integer NOT NULL,
+            published boolean NOT NULL DEFAULT TRUE,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT posts_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT post_users_fk FOREIGN KEY (owner_id) REFERENCES users (id) ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        DO $$
+        DECLARE
+            month date := date_trunc('month', coalesce((SELECT min(created_at) FROM posts_unpartitioned), now()));
+            last date := date_trunc('month', now()) + interval '%d months';
+        BEGIN
+            WHILE month <= last LOOP
+                EXECUTE format('CREATE TABLE %%I PARTITION OF posts FOR VALUES FROM (%%L) TO (%%L)',
+                               'posts_' || to_char(month, '"y"YYYY"m"MM'), month, month + interval '1 month');
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    """ % MONTHS_AHEAD)
+    op.execute("CREATE TABLE posts_default PARTITION OF posts DEFAULT")
+    op.execute("""
+        INSERT INTO posts (id, title, content, owner_id, published, created_at)
+        SELECT id, title, content, owner_id, published, created_at FROM posts_unpartitioned
+    """)
+    op.execute("ALTER SEQUENCE posts_id_seq OWNED BY posts.id")
+    op.execute("DROP TABLE posts_unpartitioned")
+
+    # votes: HASH (post_id)
+    op.execute("ALTER TABLE votes RENAME TO votes_unpartitioned")
+    op.execute("ALTER TABLE votes_unpartitioned RENAME CONSTRAINT votes_pkey TO votes_unpartitioned_pkey")
+    op.execute("ALTER TABLE votes_unpartitioned RENAME CONSTRAINT votes_user_id_fkey TO votes_unpartitioned_user_id_fkey")
+    op.execute("""
+        CREATE TABLE votes (
+            user_id integer NOT NULL,
+            post_id integer NOT NULL,
+            CONSTRAINT votes_pkey PRIMARY KEY (user_id, post_id),
+            CONSTRAINT votes_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) PARTITION BY HASH (post_id)
+    """)
+    for remainder in range(VOTE_PARTITIONS):
+        op.execute(f"CREATE TABLE votes_p{remainder:02d} PARTITION OF votes "
+                   f"FOR VALUES WITH (MODULUS {VOTE_PARTITIONS}, REMAINDER {remainder})")
+    # the primary key leads with user_id; per-post counts need their own index
+    op.create_index('ix_votes_post_id', 'votes', ['post_id'])
+    op.execute("INSERT INTO votes (user_id, post_id) SELECT user_id, post_id FROM votes_unpartitioned")
+    op.execute("DROP TABLE votes_unpartitioned")
+    pass
+
+
+def downgrade():
+    op.execute("ALTER TABLE votes RENAME TO votes_partitioned")
+    op.create_table('votes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'post_id', name='votes_pkey_new'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE', name='votes_user_id_fkey_new'))
+    op.execute("INSERT INTO votes (user_id, post_id) SELECT user_id, post_id FROM votes_partitioned")
+    op.execute("DROP TABLE votes_partitioned")
+    op.execute("ALTER TABLE votes RENAME CONSTRAINT votes_pkey_new TO votes_pkey")
+    op.execute("ALTER TABLE votes RENAME CONSTRAINT votes_user_id_fkey_new TO votes_user_id_fkey")
+
+    op.execute("ALTER TABLE posts RENAME TO posts_partitioned")
+    op.execute("""
+        CREATE TABLE posts (
+            id integer NOT NULL DEFAULT nextval('posts_id_seq'),
+            title varchar NOT NULL,
+            content varchar NOT NULL,
+            owner_id integer NOT NULL,
+            published boolean NOT NULL DEFAULT TRUE,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO posts (id, title, content, owner_id, published, created_at)
+        SELECT id, title, content, owner_id, published, created_at FROM posts_partitioned
+    """)
+    op.execute("ALTER SEQUENCE posts_id_seq OWNED BY posts.id")
+    op.execute("DROP TABLE posts_partitioned")
+    op.execute("ALTER TABLE posts ADD CONSTRAINT posts_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE posts ADD CONSTRAINT post_users_fk FOREIGN KEY (owner_id) REFERENCES users (id) ON DELETE CASCADE")
+    op.execute("DELETE FROM votes WHERE post_id NOT IN (SELECT id FROM posts)")
+    op.execute("ALTER TABLE votes ADD CONSTRAINT votes_post_id_fkey FOREIGN KEY (post_id) REFERENCES posts (id) ON DELETE CASCADE")
+    pass
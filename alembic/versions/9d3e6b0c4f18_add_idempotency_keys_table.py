@@ -0,0 +1,35 @@
+"""add idempotency keys table
+
+Revision ID: 9d3e6b0c4f18
+Revises: 5f2c8e1d9a47
+Create Date: 2026-10-19 17:32:40.512093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e6b0c4f18'
+down_revision: Union[str, None] = '5f2c8e1d9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table('idempotency_keys',
+                    sa.Column('key', sa.String(), nullable=False),
+                    sa.Column('fingerprint', sa.LargeBinary(), nullable=False),
+                    sa.Column('response', sa.LargeBinary(), nullable=True),
+                    sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False),
+                    sa.PrimaryKeyConstraint('key'))
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+    pass
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    pass
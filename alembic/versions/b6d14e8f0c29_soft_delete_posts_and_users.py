@@ -0,0 +1,61 @@
+"""soft delete posts and users
+
+Adds deleted_at to posts and users. Partial indexes keep the rows waiting
+for the reaper cheap to find and leave live rows' indexes unchanged in
+size; a user's email only has to be unique among live users.
+
+Revision ID: b6d14e8f0c29
+Revises: 3a8f6c1e2b57
+Create Date: 2026-10-19 19:58:13.402771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d14e8f0c29'
+down_revision: Union[str, None] = '3a8f6c1e2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+    op.create_index('ix_posts_deleted_at', 'posts', ['deleted_at'],
+                    postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.create_index('ix_users_deleted_at', 'users', ['deleted_at'],
+                    postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    # a user's latest posts: only live ones are ever read
+    op.drop_index('ix_posts_owner_id_created_at', table_name='posts')
+    op.create_index('ix_posts_owner_id_created_at', 'posts', ['owner_id', sa.text('created_at DESC')],
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+
+    op.drop_constraint('users_email_key', 'users', type_='unique')
+    op.create_index('ux_users_email', 'users', ['email'], unique=True,
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+    pass
+
+
+def downgrade():
+    # rows still waiting for the reaper would come back to life
+    op.execute("UPDATE posts SET deleted_at = now() WHERE deleted_at IS NULL "
+               "AND owner_id IN (SELECT id FROM users WHERE deleted_at IS NOT NULL)")
+    op.execute("DELETE FROM votes WHERE post_id IN (SELECT id FROM posts WHERE deleted_at IS NOT NULL)")
+    op.execute("DELETE FROM post_bodies WHERE post_id IN (SELECT id FROM posts WHERE deleted_at IS NOT NULL)")
+    op.execute("DELETE FROM posts WHERE deleted_at IS NOT NULL")
+    op.execute("DELETE FROM users WHERE deleted_at IS NOT NULL")
+
+    op.drop_index('ux_users_email', table_name='users')
+    op.create_unique_constraint('users_email_key', 'users', ['email'])
+    op.drop_index('ix_posts_owner_id_created_at', table_name='posts')
+    op.create_index('ix_posts_owner_id_created_at', 'posts', ['owner_id', sa.text('created_at DESC')])
+    op.drop_index('ix_users_deleted_at', table_name='users')
+    op.drop_index('ix_posts_deleted_at', table_name='posts')
+    op.drop_column('users', 'deleted_at')
+    op.drop_column('posts', 'deleted_at')
+    pass
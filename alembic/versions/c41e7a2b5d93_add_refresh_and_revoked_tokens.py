@@ -0,0 +1,53 @@
+"""add refresh and revoked tokens
+
+Revision ID: c41e7a2b5d93
+Revises: 9d3e6b0c4f18
+Create Date: 2026-10-19 18:10:27.604418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a2b5d93'
+down_revision: Union[str, None] = '9d3e6b0c4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table('refresh_tokens',
+                    sa.Column('token_hash', sa.String(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('family_id', sa.String(), nullable=False),
+                    sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False),
+                    sa.Column('rotated_at', sa.TIMESTAMP(timezone=True), nullable=True),
+                    sa.Column('created_at', sa.TIMESTAMP(timezone=True),
+                              server_default=sa.text('now()'), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('token_hash'))
+    op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+    op.create_index('ix_refresh_tokens_family_id', 'refresh_tokens', ['family_id'])
+
+    op.create_table('revoked_tokens',
+                    sa.Column('jti', sa.String(), nullable=False),
+                    sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False),
+                    sa.Column('revoked_at', sa.TIMESTAMP(timezone=True),
+                              server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('jti'))
+    op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'])
+    op.create_index('ix_revoked_tokens_revoked_at', 'revoked_tokens', ['revoked_at'])
+    pass
+
+
+def downgrade():
+    op.drop_index('ix_revoked_tokens_revoked_at', table_name='revoked_tokens')
+    op.drop_index('ix_revoked_tokens_expires_at', table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
+    op.drop_index('ix_refresh_tokens_family_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_user_id', table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
+    pass
@@ -0,0 +1,46 @@
+"""add user stats table
+
+Per-user post and received vote counters, backfilled from the current
+data, plus an index for a user's most recent posts.
+
+Revision ID: e7b9d2f4a613
+Revises: c41e7a2b5d93
+Create Date: 2026-10-19 18:42:09.331870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b9d2f4a613'
+down_revision: Union[str, None] = 'c41e7a2b5d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('post_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+                    sa.Column('votes_received', sa.Integer(), server_default=sa.text('0'), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('user_id'))
+    op.execute("""
+        INSERT INTO user_stats (user_id, post_count, votes_received)
+        SELECT u.id, coalesce(p.n, 0), coalesce(v.n, 0) FROM users u
+        LEFT JOIN (SELECT owner_id, count(*) AS n FROM posts GROUP BY owner_id) p ON p.owner_id = u.id
+        LEFT JOIN (SELECT posts.owner_id, count(*) AS n FROM votes JOIN posts ON posts.id = votes.post_id
+                   GROUP BY posts.owner_id) v ON v.owner_id = u.id
+    """)
+    # recent posts of one user; created on every partition of posts
+    op.create_index('ix_posts_owner_id_created_at', 'posts', ['owner_id', sa.text('created_at DESC')])
+    pass
+
+
+def downgrade():
+    op.drop_index('ix_posts_owner_id_created_at', table_name='posts')
+    op.drop_table('user_stats')
+    pass
@@ -0,0 +1,246 @@
+import importlib.util
+import zlib
+
+# brotli and zstandard are optional: if they are not installed we simply stop
+# advertising those encodings and fall back to gzip (always available). They
+# are only imported once something is compressed with them, which keeps them
+# off the app's import path.
+HAVE_BROTLI = importlib.util.find_spec("brotli") is not None
+HAVE_ZSTANDARD = importlib.util.find_spec("zstandard") is not None
+
+
+# Content types that are already compressed (images, archives...) or that must
+# not be buffered (server-sent events) are passed through untouched.
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 -> gzip container
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        import brotli
+
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        import zstandard
+
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._flush_finish = zstandard.COMPRESSOBJ_FLUSH_FINISH
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(self._flush_finish)
+
+
+def available_encodings():
+    """Encodings supported by this process, in server preference order."""
+    encodings = []
+    if HAVE_ZSTANDARD:
+        encodings.append("zstd")
+    if HAVE_BROTLI:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """One-shot compression of a complete body."""
+    if encoding == "gzip":
+        obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return obj.compress(data) + obj.flush()
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+def make_compressor(encoding: str, level: int):
+    """Incremental compressor used for streaming responses."""
+    if encoding == "gzip":
+        return _GzipCompressor(level)
+    if encoding == "br":
+        return _BrotliCompressor(level)
+    if encoding == "zstd":
+        return _ZstdCompressor(level)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: str, supported):
+    """Pick the best encoding from an Accept-Encoding header.
+
+    Honours q-values (``gzip;q=0.5``) and ``*``. Ties are broken by the order of
+    `supported`, so the server preference wins when the client doesn't care.
+    Returns None when nothing acceptable is supported.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    wildcard = None
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token == "*":
+            wildcard = q
+        else:
+            weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with zstd, brotli or gzip.
+
+    Bodies smaller than `minimum_size` are sent as-is since the framing
+    overhead outweighs the savings. Streaming responses (``more_body``) are
+    compressed incrementally and flushed per chunk so clients still receive
+    data as it is produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, encodings=None,
+                 gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        supported = available_encodings()
+        if encodings:
+            # keep the caller's preference order but drop anything we can't do
+            supported = [e for e in encodings if e in supported]
+        self.encodings = supported
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, level: int, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the start message until we've seen the first body chunk and
+            # know whether compression applies.
+            self.start_message = message
+            headers = {k.lower(): v for k, v in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+            self.passthrough = (
+                b"content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or content_type.startswith(EXCLUDED_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            headers = [(k, v) for k, v in self.start_message.get("headers", [])
+                       if k.lower() not in (b"content-length", b"vary")]
+            vary = [v for k, v in self.start_message.get("headers", []) if k.lower() == b"vary"]
+            vary_value = b", ".join(vary + [b"Accept-Encoding"]) if vary else b"Accept-Encoding"
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+            headers.append((b"vary", vary_value))
+
+            if not more_body:
+                compressed = compress(body, self.encoding, self.level)
+                headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                await self.send({**self.start_message, "headers": headers})
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            # streaming: no content-length, compress chunk by chunk
+            self.compressor = make_compressor(self.encoding, self.level)
+            await self.send({**self.start_message, "headers": headers})
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
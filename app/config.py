@@ -23,8 +23,90 @@ class Settings(BaseSettings):
     # and coerce common env string representations. This prevents a hard failure when
     # a hosting UI accidentally sets the variable to a non-numeric value like "false".
     access_token_expire_minutes: int = Field(30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    # Refresh tokens are stored server side and rotated on every use, so
+    # access tokens can stay short-lived. Revoked access tokens (logout) are
+    # picked up by other workers within `revocation_sync_seconds`.
+    refresh_token_expire_days: int = Field(30, env="REFRESH_TOKEN_EXPIRE_DAYS")
+    revocation_sync_seconds: int = Field(10, env="REVOCATION_SYNC_SECONDS")
     # Optional single URL (e.g. provided by Render, Heroku, Railway):
     database_url: Optional[str] = Field(None, env="DATABASE_URL")
+    # Connection pool of each worker. gunicorn.conf.py derives both from the
+    # worker count when DB_MAX_CONNECTIONS is set.
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    # Response compression. Encodings are listed in server preference order;
+    # ones whose library isn't installed (brotli, zstandard) are skipped.
+    compression_enabled: bool = Field(True, env="COMPRESSION_ENABLED")
+    compression_minimum_size: int = Field(500, env="COMPRESSION_MINIMUM_SIZE")
+    compression_encodings: str = Field("zstd,br,gzip", env="COMPRESSION_ENCODINGS")
+    compression_gzip_level: int = Field(6, env="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(4, env="COMPRESSION_BROTLI_QUALITY")
+    compression_zstd_level: int = Field(3, env="COMPRESSION_ZSTD_LEVEL")
+    # Static files and the index page are cached in memory. Set to false on
+    # immutable deployments to skip the per-request mtime check.
+    static_check_mtime: bool = Field(True, env="STATIC_CHECK_MTIME")
+    # Live vote count streams (GET /posts/{id}/live). "local" only reaches
+    # subscribers in the same worker; "postgres" fans out with LISTEN/NOTIFY;
+    # "auto" picks postgres when the database is Postgres. Streams re-read
+    # the count every `live_resync_seconds` in case an update was lost.
+    live_broker: str = Field("auto", env="LIVE_BROKER")
+    live_max_subscribers: int = Field(10000, env="LIVE_MAX_SUBSCRIBERS")
+    live_heartbeat_seconds: int = Field(15, env="LIVE_HEARTBEAT_SECONDS")
+    live_resync_seconds: int = Field(60, env="LIVE_RESYNC_SECONDS")
+    # Partition maintenance (scripts/archive_posts.py). Monthly posts
+    # partitions older than `archive_after_days` are rewritten compressed.
+    partition_months_ahead: int = Field(3, env="PARTITION_MONTHS_AHEAD")
+    archive_after_days: int = Field(365, env="ARCHIVE_AFTER_DAYS")
+    archive_compression: str = Field("lz4", env="ARCHIVE_COMPRESSION")
+    archive_tablespace: Optional[str] = Field(None, env="ARCHIVE_TABLESPACE")
+    # Idempotency-Key support on POST /posts and POST /vote: "database"
+    # (shared across workers), "memory" (per worker LRU, so only for a
+    # single worker) or "off".
+    idempotency_backend: str = Field("database", env="IDEMPOTENCY_BACKEND")
+    idempotency_ttl_seconds: int = Field(86400, env="IDEMPOTENCY_TTL_SECONDS")
+    idempotency_max_entries: int = Field(10000, env="IDEMPOTENCY_MAX_ENTRIES")
+    # Request bodies over `max_request_body_bytes` are rejected with 413
+    # before being read. Post content over `post_preview_chars` is stored
+    # separately and lists only return the preview.
+    max_request_body_bytes: int = Field(512 * 1024, env="MAX_REQUEST_BODY_BYTES")
+    post_title_max_length: int = Field(300, env="POST_TITLE_MAX_LENGTH")
+    post_content_max_length: int = Field(100000, env="POST_CONTENT_MAX_LENGTH")
+    post_preview_chars: int = Field(500, env="POST_PREVIEW_CHARS")
+    # Upper bound on ids accepted by GET /posts/batch
+    batch_max_ids: int = Field(100, env="BATCH_MAX_IDS")
+    # Number of latest posts returned by GET /users/{id}/stats
+    user_stats_recent_posts: int = Field(5, env="USER_STATS_RECENT_POSTS")
+    # Password hashing. The first scheme is used for new hashes; hashes in
+    # the other schemes (or with older parameters) are upgraded on login.
+    # Memory cost is in KiB and is allocated per concurrent login, so keep it
+    # modest on small instances. Use scripts/bench_password_hash.py to tune.
+    password_schemes: str = Field("argon2,bcrypt", env="PASSWORD_SCHEMES")
+    argon2_memory_cost: int = Field(19456, env="ARGON2_MEMORY_COST")
+    argon2_time_cost: int = Field(2, env="ARGON2_TIME_COST")
+    argon2_parallelism: int = Field(1, env="ARGON2_PARALLELISM")
+    bcrypt_rounds: int = Field(12, env="BCRYPT_ROUNDS")
+
+    # Per-worker warm-up at startup (app/warmup.py): opens pool connections,
+    # compiles the hot queries and builds the response serializers. Startup
+    # waits at most `warmup_budget_seconds`; GET /ready reports when it's done.
+    # `warmup_top_posts` > 0 also reads the most voted posts into the DB cache.
+    warmup_enabled: bool = Field(True, env="WARMUP_ENABLED")
+    warmup_budget_seconds: float = Field(5.0, env="WARMUP_BUDGET_SECONDS")
+    warmup_connections: int = Field(2, env="WARMUP_CONNECTIONS")
+    warmup_top_posts: int = Field(0, env="WARMUP_TOP_POSTS")
+
+    # GET /ready checks the database on its own connection at most once per
+    # `readiness_check_seconds`; GET /health (liveness) does no I/O at all.
+    readiness_check_seconds: float = Field(5.0, env="READINESS_CHECK_SECONDS")
+    readiness_timeout_seconds: int = Field(2, env="READINESS_TIMEOUT_SECONDS")
+
+    # Soft-deleted posts and users are purged by app/reaper.py: every
+    # `reaper_interval_seconds` (0 = never; run scripts/reap_deleted.py from
+    # cron instead), once deleted for `reaper_grace_seconds`, deleting at most
+    # `reaper_batch_size` votes per transaction.
+    reaper_interval_seconds: float = Field(60.0, env="REAPER_INTERVAL_SECONDS")
+    reaper_grace_seconds: int = Field(0, env="REAPER_GRACE_SECONDS")
+    reaper_batch_size: int = Field(1000, env="REAPER_BATCH_SIZE")
 
     class Config:
         env_file = ".env"
@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine
+from datetime import timezone
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import time
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import TIMESTAMP, TypeDecorator
+import threading
 from .config import settings
 
 # Allow a single DATABASE_URL to be provided by the host (Render, Heroku, etc.).
@@ -14,14 +17,122 @@ else:
     SQLALCHEMY_DATABASE_URL = f'postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}'
 
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Supported backends: Postgres in production, SQLite (e.g. in memory for the
+# tests). Models use the portable pieces below instead of Postgres-only SQL.
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class utcnow(FunctionElement):
+    """Current timestamp, usable as a server_default on either backend."""
+    type = TIMESTAMP(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "now()"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+class UTCDateTime(TypeDecorator):
+    """TIMESTAMP WITH TIME ZONE on Postgres. SQLite has no time zones, so
+    values are stored as naive UTC and given tzinfo back when read."""
+    impl = TIMESTAMP(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "sqlite" and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    # Let SQLAlchemy, not pysqlite, decide when transactions begin so that
+    # SAVEPOINTs (used by the tests' rollback fixtures) work, and enforce
+    # foreign keys (ON DELETE CASCADE) like Postgres does.
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _sqlite_on_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+def make_engine(url: str):
+    """create_engine() with the per-backend settings this app relies on."""
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # every connection would otherwise get its own empty database
+        kwargs["poolclass"] = StaticPool
+    engine = create_engine(url, **kwargs)
+    event.listen(engine, "connect", _sqlite_on_connect)
+    event.listen(engine, "begin", _sqlite_on_begin)
+    return engine
+
+
+def insert(table, bind):
+    """The dialect's INSERT construct, which adds on_conflict_do_*()."""
+    if bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(table)
+
+
+# The engine is built on first use rather than at import: creating it loads
+# the psycopg2 driver, which only costs startup time for code paths (alembic
+# autogenerate, scripts, tests with an overridden get_db) that never connect.
+_engine = None
+_engine_lock = threading.Lock()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
 
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = make_engine(SQLALCHEMY_DATABASE_URL)
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def current_engine():
+    """The engine if it was created already, else None. Unlike get_engine(),
+    never creates it (so never connects), e.g. for reporting."""
+    return _engine
+
+
+def dispose_engine():
+    # Close pooled connections (called from the app's lifespan shutdown, after
+    # in-flight requests have finished).
+    if _engine is not None:
+        _engine.dispose()
+
+
+def __getattr__(name):
+    # keep `from .database import engine` working for existing callers
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,94 @@
+"""Readiness checks for GET /ready.
+
+The database check runs `SELECT 1` on a connection of its own, so probes
+never wait for (or take) a slot in the request pool, and at most once every
+`interval_seconds` per worker; probes in between get the cached result.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from .config import settings
+from .database import SQLALCHEMY_DATABASE_URL
+
+
+class DatabaseCheck:
+    def __init__(self, url: str, interval_seconds: float = 5, timeout_seconds: int = 2):
+        self.url = url
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.ok = None
+        self.error = None
+        self.checked_at = None
+        self._checked = None  # monotonic time of the last check
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def stale(self) -> bool:
+        return self._checked is None or time.monotonic() - self._checked >= self.interval_seconds
+
+    def check(self):
+        """Refresh the result if it is stale. Blocking; concurrent callers
+        don't queue up behind a slow check, they keep the cached result."""
+        if not self.stale() or not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self.stale():
+                self._run()
+        finally:
+            self._lock.release()
+
+    def _run(self):
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.pool import StaticPool
+
+        if self._engine is None:
+            connect_args = {}
+            if self.url.startswith("postgresql"):
+                connect_args["connect_timeout"] = self.timeout_seconds
+            # one long-lived connection, separate from the request pool
+            self._engine = create_engine(self.url, poolclass=StaticPool, connect_args=connect_args)
+        try:
+            with self._engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self.ok, self.error = True, None
+        except Exception as e:
+            lines = str(e).strip().splitlines()
+            self.ok = False
+            self.error = f"{e.__class__.__name__}: {lines[0]}" if lines else e.__class__.__name__
+            # reconnect from scratch next time
+            self._engine.dispose()
+        self.checked_at = datetime.now(timezone.utc)
+        self._checked = time.monotonic()
+
+    def report(self) -> dict:
+        return {
+            "ok": self.ok,
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+        }
+
+    def close(self):
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+def pool_report(engine) -> dict:
+    """Connections in use versus the request pool's size. A saturation over 1
+    means overflow connections are open (`overflow` > 0)."""
+    if engine is None:
+        return {"created": False}
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"created": True}
+    return {
+        "created": True,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(pool.checkedout() / pool.size(), 3) if pool.size() else None,
+    }
+
+
+db_check = DatabaseCheck(SQLALCHEMY_DATABASE_URL, interval_seconds=settings.readiness_check_seconds,
+                         timeout_seconds=settings.readiness_timeout_seconds)
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import anyio
+from starlette.responses import JSONResponse, Response
+
+
+# claim() outcomes
+CLAIMED = "claimed"          # caller owns the key and must run the request
+DONE = "done"                # a stored response is available for replay
+IN_PROGRESS = "in_progress"  # another request with this key is still running
+MISMATCH = "mismatch"        # key reused with a different request
+
+
+def encode_record(status_code: int, content_type: str, body: bytes) -> bytes:
+    """Pack a response as: status (2 bytes), content-type length (1 byte),
+    content-type, then the zlib-compressed body."""
+    ct = content_type.encode("latin-1")[:255]
+    return struct.pack(">HB", status_code, len(ct)) + ct + zlib.compress(body)
+
+
+def decode_record(record: bytes):
+    status_code, ct_len = struct.unpack_from(">HB", record)
+    content_type = record[3:3 + ct_len].decode("latin-1")
+    return status_code, content_type, zlib.decompress(record[3 + ct_len:])
+
+
+class MemoryBackend:
+    """Per-process LRU of stored responses. Cheap, but duplicates landing on
+    different workers are not detected; use DatabaseBackend for that."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 86400, lock_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        # key -> (fingerprint, record or None while in flight, expires_at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: bytes):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                if entry[0] != fingerprint:
+                    return MISMATCH, None
+                if entry[1] is None:
+                    return IN_PROGRESS, None
+                return DONE, entry[1]
+            self._entries[key] = (fingerprint, None, now + self.lock_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return CLAIMED, None
+
+    def complete(self, key: str, fingerprint: bytes, record: bytes):
+        with self._lock:
+            self._entries[key] = (fingerprint, record, time.monotonic() + self.ttl_seconds)
+
+    def release(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class DatabaseBackend:
+    """Stores responses in the idempotency_keys table so every worker sees them.
+
+    A claim is a row with no response yet; it expires after `lock_seconds`
+    so a crashed worker doesn't block the key forever.
+    """
+
+    def __init__(self, ttl_seconds: int = 86400, lock_seconds: int = 60):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._claims = 0
+
+    def _session(self):
+        from .database import SessionLocal, get_engine
+
+        get_engine()
+        return SessionLocal()
+
+    def claim(self, key: str, fingerprint: bytes):
+        from . import models
+        from .database import insert
+
+        now = datetime.now(timezone.utc)
+        table = models.IdempotencyKey.__table__
+        db = self._session()
+        try:
+            self._claims += 1
+            if self._claims % 100 == 0:
+                db.execute(table.delete().where(table.c.expires_at < now))
+            else:
+                db.execute(table.delete().where(table.c.key == key, table.c.expires_at < now))
+            inserted = db.execute(insert(table, db.get_bind()).values(
+                key=key, fingerprint=fingerprint, response=None,
+                expires_at=now + timedelta(seconds=self.lock_seconds),
+            ).on_conflict_do_nothing().returning(table.c.key)).first()
+            db.commit()
+            if inserted:
+                return CLAIMED, None
+            row = db.execute(table.select().where(table.c.key == key)).first()
+        finally:
+            db.close()
+        if row is None:
+            # expired and purged between our insert and select; let the retry claim it
+            return IN_PROGRESS, None
+        if row.fingerprint != fingerprint:
+            return MISMATCH, None
+        if row.response is None:
+            return IN_PROGRESS, None
+        return DONE, row.response
+
+    def complete(self, key: str, fingerprint: bytes, record: bytes):
+        from . import models
+
+        table = models.IdempotencyKey.__table__
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        db = self._session()
+        try:
+            db.execute(table.update().where(table.c.key == key).values(response=record, expires_at=expires_at))
+            db.commit()
+        finally:
+            db.close()
+
+    def release(self, key: str):
+        from . import models
+
+        table = models.IdempotencyKey.__table__
+        db = self._session()
+        try:
+            db.execute(table.delete().where(table.c.key == key))
+            db.commit()
+        finally:
+            db.close()
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for retried POSTs carrying an Idempotency-Key.
+
+    Keys are scoped to the caller's Authorization header, and a key reused
+    with a different body is rejected with 422. A duplicate that arrives while
+    the first request is still running waits up to `wait_seconds` for its
+    result, then gets a 409. 5xx responses are not stored so they can be
+    retried.
+    """
+
+    def __init__(self, app, backend, paths, wait_seconds: float = 10.0, header: str = "idempotency-key"):
+        self.app = app
+        self.backend = backend
+        self.paths = set(paths)
+        self.wait_seconds = wait_seconds
+        self.header = header.lower().encode("latin-1")
+        self._sync = not isinstance(backend, MemoryBackend)
+
+    async def _call(self, fn, *args):
+        # the database backend blocks, keep it off the event loop
+        if self._sync:
+            return await anyio.to_thread.run_sync(fn, *args)
+        return fn(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        idem_key = headers.get(self.header)
+        if not idem_key:
+            await self.app(scope, receive, send)
+            return
+        if len(idem_key) > 255:
+            await _error(scope, receive, send, 400, "Idempotency-Key must be at most 255 characters")
+            return
+
+        # Buffer the body to fingerprint it, then replay it to the app.
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        key = f"{_key_scope(headers.get(b'authorization', b''))}:{idem_key.decode('latin-1')}"
+        fingerprint = hashlib.sha256(scope["path"].encode() + b"\0" + body).digest()[:16]
+
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            state, record = await self._call(self.backend.claim, key, fingerprint)
+            if state != IN_PROGRESS or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(0.05)
+
+        if state == DONE:
+            status_code, content_type, stored = decode_record(record)
+            response = Response(stored, status_code=status_code, media_type=content_type or None,
+                                headers={"idempotent-replayed": "true"})
+            await response(scope, receive, send)
+            return
+        if state == MISMATCH:
+            await _error(scope, receive, send, 422, "Idempotency-Key was already used with a different request")
+            return
+        if state == IN_PROGRESS:
+            await _error(scope, receive, send, 409, "A request with this Idempotency-Key is still in progress")
+            return
+
+        sent = False
+
+        async def replay_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        captured = {"status": 500, "content_type": "", "body": []}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                for k, v in message.get("headers", []):
+                    if k.lower() == b"content-type":
+                        captured["content_type"] = v.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            await self._call(self.backend.release, key)
+            raise
+
+        if captured["status"] >= 500:
+            await self._call(self.backend.release, key)
+        else:
+            record = encode_record(captured["status"], captured["content_type"], b"".join(captured["body"]))
+            await self._call(self.backend.complete, key, fingerprint, record)
+
+
+def _key_scope(authorization: bytes) -> str:
+    # Keys belong to the user, not to the token: access tokens are
+    # short-lived and re-issued by /token/refresh, and a client that
+    # refreshes between retries must still hit its stored response. The
+    # token is verified, so a forged claim can't reach another user's keys.
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        from .oauth2 import verify_access_token
+
+        try:
+            return f"u{verify_access_token(token, ValueError()).id}"
+        except ValueError:
+            pass
+    # no valid token (the request will most likely be refused anyway)
+    return hashlib.sha256(authorization).hexdigest()[:16]
+
+
+async def _error(scope, receive, send, status_code: int, detail: str):
+    await JSONResponse({"detail": detail}, status_code=status_code)(scope, receive, send)
+
+
+def make_backend(name: str, ttl_seconds: int, max_entries: int):
+    if name == "database":
+        return DatabaseBackend(ttl_seconds=ttl_seconds)
+    return MemoryBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
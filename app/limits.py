@@ -0,0 +1,72 @@
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+
+class RequestTooLarge(HTTPException):
+    def __init__(self, max_body_size: int):
+        super().__init__(status_code=413, detail=f"Request body larger than {max_body_size} bytes")
+
+
+class BodySizeLimitMiddleware:
+    """Rejects request bodies larger than `max_body_size` bytes with a 413.
+
+    A declared Content-Length is checked before anything is read. Chunked
+    bodies are counted as they arrive and cut off at the limit, so an
+    oversized body is never buffered whole, whether by FastAPI's parsing or
+    by the idempotency middleware further in.
+    """
+
+    def __init__(self, app, max_body_size: int, methods=("POST", "PUT", "PATCH")):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.methods = set(methods)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        for key, value in scope.get("headers", []):
+            if key == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    await JSONResponse({"detail": "Invalid Content-Length"}, status_code=400)(scope, receive, send)
+                    return
+                if declared > self.max_body_size:
+                    await self._reject(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # an HTTPException, so FastAPI's body parsing passes it
+                    # through as a 413 rather than wrapping it in a 400
+                    raise RequestTooLarge(self.max_body_size)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            # raised outside FastAPI's exception handling (e.g. while the
+            # idempotency middleware buffers the body)
+            if started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        await JSONResponse({"detail": f"Request body larger than {self.max_body_size} bytes"},
+                           status_code=413, headers={"Connection": "close"})(scope, receive, send)
@@ -0,0 +1,266 @@
+import abc
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import event, text
+
+from .config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Broker(abc.ABC):
+    """Transport that carries vote count changes to every worker's hub.
+
+    Updates are deltas (+1 for a vote, -1 for an unvote) so publishers never
+    have to count a post's votes. `start(deliver, resync)` is called once
+    with two thread-safe callbacks: `deliver(post_id, delta)`, and
+    `resync()` for when updates may have been missed (e.g. the listener
+    reconnected), which makes every stream re-read its count.
+    `publish(db, ...)` is called from the vote's request thread inside its
+    transaction, before commit, and must only deliver if that commits.
+    """
+
+    # True when updates published here may be delivered by another process,
+    # so publishers can't skip work just because this process has no listeners.
+    distributed = False
+
+    @abc.abstractmethod
+    def start(self, deliver, resync):
+        ...
+
+    @abc.abstractmethod
+    def publish(self, db, post_id: int, delta: int):
+        ...
+
+    def stop(self):
+        pass
+
+
+class LocalBroker(Broker):
+    """In-process broker: only subscribers of the same worker see updates."""
+
+    def __init__(self):
+        self._deliver = None
+
+    def start(self, deliver, resync):
+        self._deliver = deliver
+
+    def publish(self, db, post_id: int, delta: int):
+        if self._deliver is not None:
+            deliver = self._deliver
+            event.listen(db, "after_commit", lambda session: deliver(post_id, delta), once=True)
+
+
+class PostgresBroker(Broker):
+    """Fans updates out across workers with Postgres LISTEN/NOTIFY.
+
+    A daemon thread holds one dedicated connection listening on `channel`.
+    Publishes are a pg_notify in the vote's own transaction: no extra
+    connection, and Postgres only sends it if the vote commits.
+    """
+
+    distributed = True
+
+    def __init__(self, dsn: str, channel: str = "post_votes"):
+        self.dsn = dsn
+        self.channel = channel
+        self._deliver = None
+        self._resync = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, deliver, resync):
+        self._deliver = deliver
+        self._resync = resync
+        self._thread = threading.Thread(target=self._listen, name="live-broker", daemon=True)
+        self._thread.start()
+
+    def publish(self, db, post_id: int, delta: int):
+        db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                   {"channel": self.channel, "payload": f"{post_id}:{delta}"})
+
+    def stop(self):
+        self._stopped.set()
+
+    def _listen(self):
+        import select
+        import psycopg2
+
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel}")
+                # anything sent before LISTEN (first start, or while we were
+                # reconnecting) is lost
+                self._resync()
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        post_id, _, delta = note.payload.partition(":")
+                        self._deliver(int(post_id), int(delta))
+            except Exception:
+                logger.exception("live broker: listener failed, reconnecting")
+                self._stopped.wait(2.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+class Subscription:
+    """One connection's view of a post's vote count changes.
+
+    Holds only the sum of the changes not read yet: updates arriving faster
+    than the client reads them add up, so a slow connection never queues
+    more than one pending update (coalescing doubles as backpressure).
+    `stale` is set when updates may have been lost; the reader should then
+    re-read the count. `closed` is set when the server shuts down; the
+    reader should then end the stream.
+    """
+
+    __slots__ = ("post_id", "_delta", "_event", "stale", "closed")
+
+    def __init__(self, post_id: int):
+        self.post_id = post_id
+        self._delta = 0
+        self._event = asyncio.Event()
+        self.stale = False
+        self.closed = False
+
+    def offer(self, delta: int):
+        self._delta += delta
+        self._event.set()
+
+    def invalidate(self):
+        self.stale = True
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    async def get(self, timeout: float = None):
+        """Wait for the next change; returns the net delta, or None on timeout."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._event.clear()
+        delta, self._delta = self._delta, 0
+        return delta
+
+
+class VoteHub:
+    """Per-process pub/sub of vote count changes keyed by post id."""
+
+    def __init__(self, broker: Broker = None, max_subscribers: int = 10000):
+        self.broker = broker or LocalBroker()
+        self.max_subscribers = max_subscribers
+        self._topics = {}
+        self._count = 0
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._loop = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def is_full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def has_listeners(self, post_id: int) -> bool:
+        # With a distributed broker another worker may have listeners.
+        return self.broker.distributed or post_id in self._topics
+
+    def subscribe(self, post_id: int) -> Subscription:
+        # must be called from the event loop
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self.broker.start(self._deliver, self._resync)
+        sub = Subscription(post_id)
+        self._topics.setdefault(post_id, set()).add(sub)
+        self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._topics.get(sub.post_id)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        self._count -= 1
+        if not subs:
+            del self._topics[sub.post_id]
+
+    def publish(self, db, post_id: int, delta: int):
+        """Announce a vote change; call inside the vote's transaction, before
+        `db.commit()`. Subscribers only hear about it once that commits."""
+        if self.has_listeners(post_id):
+            self.broker.publish(db, post_id, delta)
+
+    def _deliver(self, post_id: int, delta: int):
+        # Thread-safe entry point for brokers. Updates for the same post that
+        # land before the loop gets to them are coalesced into one dispatch.
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._pending_lock:
+            first = not self._pending
+            self._pending[post_id] = self._pending.get(post_id, 0) + delta
+        if first:
+            loop.call_soon_threadsafe(self._flush)
+
+    def _resync(self):
+        # thread-safe, like _deliver
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._invalidate)
+
+    def _invalidate(self):
+        for subs in self._topics.values():
+            for sub in subs:
+                sub.invalidate()
+
+    def close(self):
+        """End every open stream. Called on the event loop when the server
+        starts shutting down: it waits for open responses before running the
+        app's shutdown, and streams don't end on their own."""
+        for subs in self._topics.values():
+            for sub in subs:
+                sub.close()
+
+    def _flush(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for post_id, delta in pending.items():
+            for sub in self._topics.get(post_id, ()):
+                sub.offer(delta)
+
+    def stop(self):
+        self.broker.stop()
+
+
+def broker_name(name: str) -> str:
+    """Resolve the LIVE_BROKER setting: "auto" means postgres on Postgres."""
+    if name == "auto":
+        from .database import SQLALCHEMY_DATABASE_URL
+        return "postgres" if SQLALCHEMY_DATABASE_URL.startswith("postgresql") else "local"
+    return name
+
+
+def make_broker(name: str) -> Broker:
+    if broker_name(name) == "postgres":
+        from .database import SQLALCHEMY_DATABASE_URL
+        # psycopg2 wants a plain libpq URI, without the SQLAlchemy driver suffix
+        return PostgresBroker(SQLALCHEMY_DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://"))
+    return LocalBroker()
+
+
+hub = VoteHub(make_broker(settings.live_broker), max_subscribers=settings.live_max_subscribers)
@@ -1,19 +1,86 @@
-from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
+import anyio
 
-from . import models
-from .database import engine, get_db
-from sqlalchemy.orm import Session
+from . import models, live, warmup, health, database, reaper
+from .database import get_engine, dispose_engine
 from .routers import post, user, auth, vote
 from .config import settings
+from .compression import CompressionMiddleware
+from .static_cache import AssetCache, CachedStaticFiles, asset_response
+from .idempotency import IdempotencyMiddleware, make_backend
+from .limits import BodySizeLimitMiddleware
 import os
 
 
-# models.Base.metadata.create_all(bind=engine)
+INDEX_PATH = "app/static/index.html"
 
-app = FastAPI(title="Social Media Backend API", description="A minimal FastAPI backend for posts, users, auth and voting")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup work lives here rather than at import time so that importing
+    # app.main (gunicorn preload, tests, alembic) stays cheap.
+
+    # Optional: create DB tables automatically when running in an environment where
+    # you cannot run alembic (e.g. some free hosting plans). Enable by setting
+    # AUTO_CREATE_TABLES=true in the environment. This should only be used as a
+    # temporary measure for testing / debugging.
+    if os.getenv('AUTO_CREATE_TABLES', '').lower() in ('1', 'true', 'yes'):
+        try:
+            models.Base.metadata.create_all(bind=get_engine())
+        except Exception:
+            # swallow on startup; health endpoint will reveal DB errors
+            pass
+
+    # load the index page (and build its compressed variants) once
+    try:
+        static_cache.get(INDEX_PATH)
+    except OSError:
+        pass
+
+    if settings.warmup_enabled:
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(None, warmup.warm_up, settings.warmup_budget_seconds,
+                                    settings.warmup_connections, settings.warmup_top_posts)
+        # Don't hold startup past the budget. A step stuck beyond it (say, an
+        # unreachable database) finishes in the background and /ready keeps
+        # answering 503 until then.
+        await asyncio.wait({task}, timeout=settings.warmup_budget_seconds)
+
+    purger = None
+    if settings.reaper_interval_seconds > 0:
+        purger = reaper.Reaper(settings.reaper_interval_seconds, batch_size=settings.reaper_batch_size,
+                               grace_seconds=settings.reaper_grace_seconds)
+        purger.start()
+
+    yield
+
+    # The server has stopped accepting and drained in-flight requests by the
+    # time we get here; release the broker and the pooled DB connections.
+    live.hub.stop()
+    if purger is not None:
+        purger.stop()
+    health.db_check.close()
+    dispose_engine()
+
+
+app = FastAPI(title="Social Media Backend API", description="A minimal FastAPI backend for posts, users, auth and voting",
+              lifespan=lifespan)
+
+# Innermost middleware: stored responses are the uncompressed app output.
+if settings.idempotency_backend != "off":
+    app.add_middleware(
+        IdempotencyMiddleware,
+        backend=make_backend(settings.idempotency_backend, settings.idempotency_ttl_seconds,
+                             settings.idempotency_max_entries),
+        paths=["/posts/", "/vote/"],
+    )
+
+# Outside the idempotency middleware, which buffers request bodies.
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.max_request_body_bytes)
 
 origins = ["*"]
 
@@ -25,8 +92,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve static files from app/static
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        encodings=[e.strip() for e in settings.compression_encodings.split(",") if e.strip()],
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
+
+# Serve static files from app/static. Files are kept in memory with
+# precompressed variants and only re-read when their mtime changes.
+static_cache = AssetCache(check_mtime=settings.static_check_mtime)
+app.mount("/static", CachedStaticFiles(directory="app/static", cache=static_cache), name="static")
 
 app.include_router(post.router)
 app.include_router(user.router)
@@ -37,34 +116,43 @@ app.include_router(vote.router)
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     try:
-        with open("app/static/index.html", "r", encoding="utf-8") as f:
-            html = f.read()
+        asset = static_cache.cached(INDEX_PATH)
+        if asset is None:
+            # first request, or the file changed: load it off the loop
+            asset = await anyio.to_thread.run_sync(static_cache.get, INDEX_PATH)
     except Exception:
+        asset = None
+    if asset is None:
         html = "<html><body><h1>Social Media Backend</h1><p>Visit /docs for API docs.</p></body></html>"
-    return HTMLResponse(content=html)
+        return HTMLResponse(content=html)
+    return asset_response(asset, request.headers, request.method)
 
 
 @app.get('/health')
-def health(db: Session = Depends(get_db)):
-    """Health check endpoint that verifies DB connectivity."""
-    try:
-        # lightweight test query
-        db.execute("SELECT 1")
-        return {"status": "ok"}
-    except Exception as e:
-        # return a 503 so orchestrators can detect failure
-        raise HTTPException(status_code=503, detail=str(e))
-
-
-# Optional: create DB tables automatically when running in an environment where
-# you cannot run alembic (e.g. some free hosting plans). Enable by setting
-# AUTO_CREATE_TABLES=true in the environment. This should only be used as a
-# temporary measure for testing / debugging.
-if os.getenv('AUTO_CREATE_TABLES', '').lower() in ('1', 'true', 'yes'):
-    try:
-        models.Base.metadata.create_all(bind=engine)
-    except Exception:
-        # swallow on startup; health endpoint will reveal DB errors
-        pass
-
-
+async def liveness():
+    """Liveness: the worker is up and its event loop responds. No I/O, so a
+    database outage doesn't get every worker restarted."""
+    return {"status": "ok"}
+
+
+@app.get('/ready')
+async def ready():
+    """Readiness: warm-up finished and the database answers.
+
+    The database result is cached (see app/health.py); pool usage is
+    reported for information and doesn't affect the status.
+    """
+    if health.db_check.stale():
+        await anyio.to_thread.run_sync(health.db_check.check)
+    warm = warmup.state.report()
+    db = health.db_check.report()
+    is_ready = bool(db["ok"]) and (warm["done"] or not settings.warmup_enabled)
+    body = {
+        "status": "ready" if is_ready else "not_ready",
+        "database": db,
+        "pool": health.pool_report(database.current_engine()),
+        "warmup": warm,
+    }
+    if not is_ready:
+        return JSONResponse(body, status_code=503)
+    return body
@@ -1,39 +1,118 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, LargeBinary, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql.expression import text
-from sqlalchemy.sql.sqltypes import TIMESTAMP
+from sqlalchemy.sql.expression import text, true, false
 
-from .database import Base
+from .database import Base, UTCDateTime, utcnow
 
 
 class Post(Base):
+    # In Postgres this table is range-partitioned by created_at and its
+    # primary key is (id, created_at); see migration 5f2c8e1d9a47.
     __tablename__ = "posts"
 
     id = Column(Integer, primary_key=True, nullable=False)
     title = Column(String, nullable=False)
     content = Column(String, nullable=False)
-    published = Column(Boolean, server_default='TRUE', nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True),
-                        nullable=False, server_default=text('now()'))
+    published = Column(Boolean, server_default=true(), nullable=False)
+    created_at = Column(UTCDateTime(),
+                        nullable=False, server_default=utcnow())
     owner_id = Column(Integer, ForeignKey(
         "users.id", ondelete="CASCADE"), nullable=False)
+    # Content longer than the preview size lives in post_bodies; `content`
+    # then holds only the preview shown in lists.
+    content_truncated = Column(Boolean, server_default=false(), nullable=False)
+    # Soft delete: set by DELETE /posts/{id}, hidden from every read route,
+    # purged with its votes by app/reaper.py.
+    deleted_at = Column(UTCDateTime(), nullable=True)
 
     owner = relationship("User")
 
+    __table_args__ = (
+        Index("ix_posts_deleted_at", "deleted_at",
+              postgresql_where=text("deleted_at IS NOT NULL"), sqlite_where=text("deleted_at IS NOT NULL")),
+        # a user's latest posts (GET /users/{id}/stats)
+        Index("ix_posts_owner_id_created_at", "owner_id", created_at.desc(),
+              postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL")),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, nullable=False)
-    email = Column(String, nullable=False, unique=True)
+    email = Column(String, nullable=False)
     password = Column(String, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True),
-                        nullable=False, server_default=text('now()'))
+    created_at = Column(UTCDateTime(),
+                        nullable=False, server_default=utcnow())
+    # Soft delete, like posts; the email can be registered again right away.
+    deleted_at = Column(UTCDateTime(), nullable=True)
+
+    __table_args__ = (
+        Index("ux_users_email", "email", unique=True,
+              postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL")),
+        Index("ix_users_deleted_at", "deleted_at",
+              postgresql_where=text("deleted_at IS NOT NULL"), sqlite_where=text("deleted_at IS NOT NULL")),
+    )
 
 
 class Vote(Base):
+    # Hash-partitioned by post_id in Postgres, without a foreign key to posts.
     __tablename__ = "votes"
     user_id = Column(Integer, ForeignKey(
         "users.id", ondelete="CASCADE"), primary_key=True)
-    post_id = Column(Integer, ForeignKey(
-        "posts.id", ondelete="CASCADE"), primary_key=True)
-    
+    # no ForeignKey here either, so SQLite tests get no cascade Postgres lacks
+    post_id = Column(Integer, primary_key=True, index=True)
+
+
+class IdempotencyKey(Base):
+    # Stored responses for Idempotency-Key retries (see app/idempotency.py).
+    # `response` is NULL while the first request is still in flight.
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True, nullable=False)
+    fingerprint = Column(LargeBinary, nullable=False)
+    response = Column(LargeBinary, nullable=True)
+    expires_at = Column(UTCDateTime(), nullable=False, index=True)
+
+
+class RefreshToken(Base):
+    # Rotating refresh tokens (see app/oauth2.py). Only a sha256 of the token
+    # is stored. Tokens descended from one login share a family_id so reuse
+    # of an already rotated token can revoke the whole chain.
+    __tablename__ = "refresh_tokens"
+    token_hash = Column(String, primary_key=True, nullable=False)
+    user_id = Column(Integer, ForeignKey(
+        "users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String, nullable=False, index=True)
+    expires_at = Column(UTCDateTime(), nullable=False)
+    rotated_at = Column(UTCDateTime(), nullable=True)
+    created_at = Column(UTCDateTime(),
+                        nullable=False, server_default=utcnow())
+
+
+class RevokedToken(Base):
+    # Access tokens (by jti) revoked before they expire, e.g. on logout.
+    # Rows are only useful until expires_at and are purged after that.
+    __tablename__ = "revoked_tokens"
+    jti = Column(String, primary_key=True, nullable=False)
+    expires_at = Column(UTCDateTime(), nullable=False, index=True)
+    revoked_at = Column(UTCDateTime(),
+                        nullable=False, server_default=utcnow(), index=True)
+
+
+class UserStats(Base):
+    # Counters behind GET /users/{id}/stats, kept up to date by the post and
+    # vote routes (see app/stats.py) and rebuilt by scripts/rebuild_user_stats.py.
+    __tablename__ = "user_stats"
+    user_id = Column(Integer, ForeignKey(
+        "users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    post_count = Column(Integer, nullable=False, server_default=text('0'))
+    votes_received = Column(Integer, nullable=False, server_default=text('0'))
+
+
+class PostBody(Base):
+    # Full content of posts whose content_truncated is set, kept out of the
+    # posts table so list queries never read it: with STORAGE EXTERNAL,
+    # values under the ~2 kB TOAST threshold would still be stored inline
+    # in the posts rows. No foreign key, for the same reason as votes.
+    __tablename__ = "post_bodies"
+    post_id = Column(Integer, primary_key=True, nullable=False)
+    content = Column(String, nullable=False)
@@ -1,5 +1,9 @@
-from jose import JWTError, jwt
-from datetime import datetime, timedelta
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 from . import schemas, database, models
 from fastapi import Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer
@@ -15,13 +19,18 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+REFRESH_TOKEN_EXPIRE_DAYS = settings.refresh_token_expire_days
 
 
 def create_access_token(data: dict):
+    # jose is imported lazily to keep it off the startup path
+    from jose import jwt
+
     to_encode = data.copy()
 
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti identifies this token in the revocation list
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
 
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -29,6 +38,7 @@ def create_access_token(data: dict):
 
 
 def verify_access_token(token: str, credentials_exception):
+    from jose import JWTError, jwt
 
     try:
 
@@ -36,19 +46,174 @@ def verify_access_token(token: str, credentials_exception):
         id: int = payload.get("user_id")
         if id is None:
             raise credentials_exception
-        token_data = schemas.TokenData(id=id)
+        token_data = schemas.TokenData(id=id, jti=payload.get("jti"), exp=payload.get("exp"))
     except JWTError:
         raise credentials_exception
 
     return token_data
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+class RevocationList:
+    """Revoked access token ids, held in a per-worker set.
+
+    Checking a token is a set lookup. Revocations made by other workers are
+    picked up by maybe_sync(), which reads only rows added since the last
+    sync and runs at most once every `sync_seconds`, so a revoked token can
+    outlive its revocation on another worker by that long. Entries are
+    dropped once the token they block has expired anyway, which keeps the
+    set as small as the access token lifetime allows.
+    """
+
+    # re-read this far behind the newest row seen, so rows from transactions
+    # that committed late (revoked_at is their start time) are not missed
+    OVERLAP = timedelta(seconds=30)
+
+    def __init__(self, sync_seconds: float = 10):
+        self.sync_seconds = sync_seconds
+        self._revoked = {}  # jti -> expiry (unix time)
+        self._watermark = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: float):
+        self._revoked[jti] = expires_at
+
+    def prune(self, now: float = None):
+        now = now if now is not None else time.time()
+        for jti, expires_at in list(self._revoked.items()):
+            if expires_at <= now:
+                self._revoked.pop(jti, None)
+
+    def maybe_sync(self, db: Session):
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+            return
+        # one request per worker does the sync, the others keep going
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = now
+            self.sync(db)
+        finally:
+            self._lock.release()
+
+    def sync(self, db: Session):
+        table = models.RevokedToken
+        query = db.query(table.jti, table.expires_at, table.revoked_at).filter(
+            table.expires_at > datetime.now(timezone.utc))
+        if self._watermark is not None:
+            query = query.filter(table.revoked_at >= self._watermark - self.OVERLAP)
+        for jti, expires_at, revoked_at in query:
+            self.add(jti, expires_at.timestamp())
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        self.prune()
+
+
+revocations = RevocationList(sync_seconds=settings.revocation_sync_seconds)
+
+
+def revoke_access_token(db: Session, token: schemas.TokenData):
+    """Revoke an access token until it expires, here and (after their next
+    sync) on every other worker."""
+    if not token.jti or not token.exp:
+        return
+    expires_at = datetime.fromtimestamp(token.exp, timezone.utc)
+    table = models.RevokedToken.__table__
+    db.execute(table.delete().where(table.c.expires_at < datetime.now(timezone.utc)))
+    if db.get(models.RevokedToken, token.jti) is None:
+        db.add(models.RevokedToken(jti=token.jti, expires_at=expires_at))
+    db.commit()
+    revocations.add(token.jti, float(token.exp))
+
+
+def _hash_refresh_token(token: str) -> str:
+    # refresh tokens are random 256 bit values, a plain digest is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_refresh_token(db: Session, user_id: int, family_id: str = None) -> str:
+    """Store and return a new opaque refresh token. The caller commits."""
+    token = secrets.token_urlsafe(32)
+    if family_id is None:
+        # new login: a good moment to drop this user's expired tokens
+        db.query(models.RefreshToken).filter(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.expires_at < datetime.now(timezone.utc)).delete(synchronize_session=False)
+    db.add(models.RefreshToken(
+        token_hash=_hash_refresh_token(token),
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str, credentials_exception):
+    """Exchange a refresh token for a new one; returns (user_id, new_token).
+
+    Each refresh token works once. Presenting one that was already rotated
+    means it leaked (or the client is misbehaving), so its whole family is
+    revoked and the user has to log in again.
+    """
+    now = datetime.now(timezone.utc)
+    row = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == _hash_refresh_token(token)).with_for_update().first()
+    if row is None or row.expires_at <= now:
+        raise credentials_exception
+    if row.rotated_at is not None:
+        revoke_refresh_family(db, row.family_id)
+        raise credentials_exception
+
+    row.rotated_at = now
+    new_token = create_refresh_token(db, row.user_id, family_id=row.family_id)
+    db.commit()
+    return row.user_id, new_token
+
+
+def revoke_refresh_family(db: Session, family_id: str):
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.family_id == family_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def revoke_refresh_token(db: Session, token: str):
+    row = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == _hash_refresh_token(token)).first()
+    if row is not None:
+        revoke_refresh_family(db, row.family_id)
+
+
+def get_current_token(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
     credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                           detail=f"Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
     token = verify_access_token(token, credentials_exception)
 
-    user = db.query(models.User).filter(models.User.id == token.id).first()
+    revocations.maybe_sync(db)
+    if token.jti and revocations.is_revoked(token.jti):
+        raise credentials_exception
+
+    return token
+
+
+def active_user(db: Session, user_id: int):
+    """The user, unless deleted. Shared with the start-up warm-up, which
+    runs it to compile the same statement."""
+    return db.query(models.User).filter(models.User.id == user_id, models.User.deleted_at.is_(None)).first()
+
+
+def get_current_user(token: schemas.TokenData = Depends(get_current_token), db: Session = Depends(database.get_db)):
+    user = active_user(db, token.id)
+    if user is None:
+        # deleted since the token was issued
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                            detail=f"Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,162 @@
+"""Maintenance for the partitioned posts table.
+
+posts is range-partitioned by month on created_at (see the
+5f2c8e1d9a47 migration). These helpers are run periodically by
+scripts/archive_posts.py:
+
+- ensure_post_partitions() creates next months' partitions so new rows
+  never land in posts_default.
+- archive_post_partitions() rewrites cold monthly partitions into
+  compressed archive partitions (lz4 TOAST compression, fillfactor 100,
+  optionally another tablespace) and swaps them in place. They stay
+  attached to posts, so the routers keep reading them transparently.
+  The rewrite compacts the rows and can move them to a cheaper
+  tablespace; the compression rarely applies, since titles and the
+  posts.content preview stay under the ~2 kB TOAST threshold. Full
+  content of long posts is in post_bodies, which is not partitioned and
+  not archived (Postgres already compresses those values when stored).
+"""
+import logging
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger("uvicorn.error")
+
+PARTITION_RE = re.compile(r"^posts_y(\d{4})m(\d{2})(_archive)?$")
+
+
+def _month_start(d: date, offset: int = 0) -> date:
+    month = d.month - 1 + offset
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"posts_y{month.year:04d}m{month.month:02d}"
+
+
+def list_post_partitions(conn):
+    """Return [(name, month_start, archived)] for the monthly posts partitions."""
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'posts'::regclass
+    """)).scalars().all()
+    partitions = []
+    for name in rows:
+        match = PARTITION_RE.match(name)
+        if match:
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append((name, month, bool(match.group(3))))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_post_partitions(conn, months_ahead: int = 3, today: date = None):
+    """Create monthly partitions up to `months_ahead` months from now.
+
+    Also creates the partitions for any rows that landed in posts_default
+    (e.g. the job didn't run for a few months) and moves them there, since
+    Postgres refuses to create a partition whose range the default holds.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    existing = {month for _, month, _ in list_post_partitions(conn)}
+    stray = {month.date() if isinstance(month, datetime) else month for month in conn.execute(text(
+        "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM posts_default")).scalars()}
+    wanted = {_month_start(today, offset) for offset in range(months_ahead + 1)} | stray
+    created = []
+    try:
+        for month in sorted(wanted - existing):
+            name = _partition_name(month)
+            bounds = f"FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+            if month not in stray:
+                conn.execute(text(f"CREATE TABLE {name} PARTITION OF posts FOR VALUES {bounds}"))
+            else:
+                # take the default out, give the month its partition, move the
+                # month's rows over and put the default back, all in one
+                # transaction (it locks posts for the duration)
+                conn.execute(text("ALTER TABLE posts DETACH PARTITION posts_default"))
+                conn.execute(text(f"CREATE TABLE {name} PARTITION OF posts FOR VALUES {bounds}"))
+                moved = conn.execute(text(f"""
+                    WITH moved AS (
+                        DELETE FROM posts_default
+                        WHERE created_at >= '{month.isoformat()}' AND created_at < '{_month_start(month, 1).isoformat()}'
+                        RETURNING *
+                    )
+                    INSERT INTO {name} SELECT * FROM moved
+                """)).rowcount
+                conn.execute(text("ALTER TABLE posts ATTACH PARTITION posts_default DEFAULT"))
+                logger.warning("moved %d posts out of posts_default into %s", moved, name)
+            created.append(name)
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return created
+
+
+def _resolve_compression(conn, compression: str) -> str:
+    # lz4 needs a server built with it; fall back to the always-available pglz
+    if compression == "pglz":
+        return compression
+    try:
+        with conn.begin_nested():
+            conn.execute(text(f"SET LOCAL default_toast_compression = {compression}"))
+        return compression
+    except DBAPIError:
+        logger.warning("archive: %s compression unsupported, using pglz", compression)
+        return "pglz"
+
+
+def archive_post_partitions(conn, older_than_days: int = 365, compression: str = "lz4",
+                            tablespace: str = None, today: date = None):
+    """Swap monthly partitions entirely older than the cutoff for compressed copies.
+
+    Each partition is copied into `<name>_archive` with the chosen TOAST
+    compression (values are re-serialised so they are actually recompressed),
+    then detached and replaced, committing once per partition. Returns the
+    archived names.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = date.fromordinal(today.toordinal() - older_than_days)
+    partitions = list_post_partitions(conn)
+    compression = _resolve_compression(conn, compression)
+    conn.commit()
+    archived = []
+    for name, month, is_archive in partitions:
+        upper = _month_start(month, 1)
+        if is_archive or upper > cutoff:
+            continue
+        archive = f"{name}_archive"
+        storage = f" TABLESPACE {tablespace}" if tablespace else ""
+        try:
+            conn.execute(text(
+                f"CREATE TABLE {archive} (LIKE posts INCLUDING DEFAULTS) WITH (fillfactor = 100){storage}"))
+            conn.execute(text(f"ALTER TABLE {archive} ALTER COLUMN title SET COMPRESSION {compression}"))
+            conn.execute(text(f"ALTER TABLE {archive} ALTER COLUMN content SET COMPRESSION {compression}"))
+            # `|| ''` forces a fresh datum: copying a compressed value as-is
+            # would keep its original compression method.
+            conn.execute(text(f"""
+                INSERT INTO {archive} (id, title, content, owner_id, published, created_at,
+                                       content_truncated, deleted_at)
+                SELECT id, title || '', content || '', owner_id, published, created_at,
+                       content_truncated, deleted_at
+                FROM {name}
+            """))
+            # matching CHECK lets ATTACH skip the validation scan
+            conn.execute(text(
+                f"ALTER TABLE {archive} ADD CONSTRAINT {archive}_bounds CHECK "
+                f"(created_at >= '{month.isoformat()}' AND created_at < '{upper.isoformat()}')"))
+            conn.execute(text(f"ALTER TABLE posts DETACH PARTITION {name}"))
+            conn.execute(text(
+                f"ALTER TABLE posts ATTACH PARTITION {archive} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info("archived posts partition", extra={"partition": name})
+        archived.append(archive)
+    return archived
@@ -0,0 +1,150 @@
+"""Purges soft-deleted posts and users in small batches.
+
+DELETE /posts/{id} and DELETE /users/{id} only set deleted_at, and the read
+routes hide those rows from then on. reap() removes what hangs off them
+(votes, post bodies, a user's posts) `batch_size` rows per transaction, so
+deleting a post with millions of votes never holds long locks or runs
+inside a request, and finally removes the rows themselves. The user_stats
+counters are adjusted batch by batch as votes go away.
+
+Reaper runs reap() periodically in a background thread of every worker;
+on Postgres an advisory lock lets only one of them work at a time.
+scripts/reap_deleted.py runs a single pass, e.g. from cron.
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, select, text, update
+
+from . import models
+from .database import get_engine
+from .stats import bump_user_stats
+
+logger = logging.getLogger("uvicorn.error")
+
+# pg_try_advisory_lock key shared by all workers
+LOCK_KEY = 0x7265617065
+
+_posts = models.Post.__table__
+_users = models.User.__table__
+_votes = models.Vote.__table__
+_bodies = models.PostBody.__table__
+
+
+def _purge_post(conn, post_id: int, owner_id: int, batch_size: int):
+    while True:
+        # keys first, then delete by primary key: a DELETE ... IN (SELECT ...
+        # LIMIT) can get planned as a nested loop of scans over the post's votes
+        voters = conn.execute(select(_votes.c.user_id).where(
+            _votes.c.post_id == post_id).limit(batch_size)).scalars().all()
+        if voters:
+            deleted = conn.execute(delete(_votes).where(
+                _votes.c.post_id == post_id, _votes.c.user_id.in_(voters))).rowcount
+            bump_user_stats(conn, owner_id, votes=-deleted)
+        conn.commit()
+        if len(voters) < batch_size:
+            break
+    conn.execute(delete(_bodies).where(_bodies.c.post_id == post_id))
+    conn.execute(delete(_posts).where(_posts.c.id == post_id))
+    conn.commit()
+
+
+def _retire_user(conn, user_id: int, batch_size: int, now: datetime):
+    # hand their posts to the post reaper...
+    while True:
+        ids = select(_posts.c.id).where(
+            _posts.c.owner_id == user_id, _posts.c.deleted_at.is_(None)).limit(batch_size).scalar_subquery()
+        marked = conn.execute(update(_posts).where(_posts.c.id.in_(ids)).values(deleted_at=now)).rowcount
+        conn.commit()
+        if marked < batch_size:
+            break
+    # ...and take back the votes they cast, from the counters too
+    while True:
+        rows = conn.execute(select(_votes.c.post_id, _posts.c.owner_id).select_from(
+            _votes.outerjoin(_posts, _posts.c.id == _votes.c.post_id)).where(
+            _votes.c.user_id == user_id).limit(batch_size)).all()
+        if not rows:
+            break
+        conn.execute(delete(_votes).where(
+            _votes.c.user_id == user_id, _votes.c.post_id.in_({post_id for post_id, _ in rows})))
+        for owner_id, count in Counter(owner for _, owner in rows if owner is not None).items():
+            bump_user_stats(conn, owner_id, votes=-count)
+        conn.commit()
+
+
+def reap(conn, batch_size: int = 1000, grace_seconds: int = 0, max_rows: int = 100):
+    """One pass over at most `max_rows` deleted users and posts whose
+    deleted_at is older than `grace_seconds`. Returns how many were handled."""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=grace_seconds)
+    handled = 0
+
+    users = conn.execute(select(_users.c.id).where(_users.c.deleted_at <= cutoff).order_by(
+        _users.c.deleted_at).limit(max_rows)).scalars().all()
+    for user_id in users:
+        _retire_user(conn, user_id, batch_size, now)
+
+    posts = conn.execute(select(_posts.c.id, _posts.c.owner_id).where(_posts.c.deleted_at <= cutoff).order_by(
+        _posts.c.deleted_at).limit(max_rows)).all()
+    for post_id, owner_id in posts:
+        _purge_post(conn, post_id, owner_id, batch_size)
+        handled += 1
+
+    # users go last, once nothing of theirs is left (the row delete cascades
+    # to their refresh tokens and counters)
+    for user_id in users:
+        if conn.execute(select(exists().where(_posts.c.owner_id == user_id))).scalar():
+            continue
+        conn.execute(delete(_users).where(_users.c.id == user_id))
+        conn.commit()
+        handled += 1
+    if handled:
+        logger.info("reaper purged %d deleted rows", handled)
+    return handled
+
+
+class Reaper:
+    def __init__(self, interval_seconds: float, batch_size: int = 1000, grace_seconds: int = 0):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.grace_seconds = grace_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        wait = self.interval_seconds
+        while not self._stop.wait(wait):
+            try:
+                # keep going right away while there is a backlog
+                wait = 0 if self.run_once() else self.interval_seconds
+            except Exception:
+                logger.exception("reaper pass failed")
+                wait = self.interval_seconds
+
+    def run_once(self) -> int:
+        engine = get_engine()
+        postgres = engine.dialect.name == "postgresql"
+        with engine.connect() as conn:
+            if postgres:
+                locked = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}).scalar()
+                conn.commit()
+                if not locked:
+                    return 0
+            try:
+                return reap(conn, batch_size=self.batch_size, grace_seconds=self.grace_seconds)
+            finally:
+                if postgres:
+                    conn.rollback()
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+                    conn.commit()
@@ -15,21 +15,34 @@ def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session =
     try:
         # look up user by email (username field in OAuth2 form)
         user = db.query(models.User).filter(
-            models.User.email == user_credentials.username).first()
+            models.User.email == user_credentials.username, models.User.deleted_at.is_(None)).first()
 
         if not user:
             logger.info("login: user not found", extra={"email": user_credentials.username})
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
 
         # verify password (do not log passwords)
-        verified = utils.verify(user_credentials.password, user.password)
+        verified, new_hash = utils.verify_and_update(user_credentials.password, user.password)
         logger.info("login: user found", extra={"email": user_credentials.username, "verified": verified})
 
         if not verified:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
 
+        if new_hash:
+            # stored hash uses a legacy scheme or old cost settings; we only
+            # have the plain password now, so migrate it transparently
+            try:
+                user.password = new_hash
+                db.commit()
+                logger.info("login: password hash upgraded", extra={"email": user_credentials.username})
+            except Exception:
+                db.rollback()
+                logger.exception("login: password hash upgrade failed")
+
         access_token = oauth2.create_access_token(data={"user_id": user.id})
-        return {"access_token": access_token, "token_type": "bearer"}
+        refresh_token = oauth2.create_refresh_token(db, user.id)
+        db.commit()
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
     except HTTPException:
         # re-raise FastAPI HTTP exceptions
         raise
@@ -40,3 +53,21 @@ def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session =
                             detail="Internal server error during authentication")
 
 
+@router.post('/token/refresh', response_model=schemas.Token)
+def refresh(body: schemas.RefreshRequest, db: Session = Depends(database.get_db)):
+    # no password check here, so clients can renew short-lived access
+    # tokens as often as they like without paying for a hash
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                          detail="Invalid refresh token", headers={"WWW-Authenticate": "Bearer"})
+    user_id, refresh_token = oauth2.rotate_refresh_token(db, body.refresh_token, credentials_exception)
+    access_token = oauth2.create_access_token(data={"user_id": user_id})
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: schemas.LogoutRequest = None, db: Session = Depends(database.get_db),
+           token: schemas.TokenData = Depends(oauth2.get_current_token)):
+    oauth2.revoke_access_token(db, token)
+    if body is not None and body.refresh_token:
+        oauth2.revoke_refresh_token(db, body.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,10 +1,17 @@
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import json
+import time
+from datetime import datetime, timezone
 
-from sqlalchemy import func
+from fastapi.concurrency import run_in_threadpool
+
+from sqlalchemy import and_, func, select, bindparam
 # from sqlalchemy.sql.functions import func
-from .. import models, schemas, oauth2
+from .. import models, schemas, oauth2, live, stats
+from ..config import settings
 from ..database import get_db
 
 
@@ -14,6 +21,77 @@ router = APIRouter(
 )
 
 
+# Core statements for the read routes. They are built once at import and take
+# every value as a bound parameter, so each request reuses the same compiled
+# SQL from the engine's cache, and they return plain rows instead of ORM
+# objects. The owner is joined in rather than loaded per post.
+_posts = models.Post.__table__
+_users = models.User.__table__
+_votes = models.Vote.__table__
+_bodies = models.PostBody.__table__
+_vote_count = func.count(_votes.c.post_id)
+
+_columns = (
+    _posts.c.id, _posts.c.title, _posts.c.published, _posts.c.created_at, _posts.c.owner_id,
+    _users.c.email.label("owner_email"), _users.c.created_at.label("owner_created_at"),
+    _vote_count.label("votes"),
+    (_vote_count.filter(_votes.c.user_id == bindparam("user_id")) > 0).label("voted_by_me"),
+)
+_joined = _posts.join(_users, _users.c.id == _posts.c.owner_id).outerjoin(
+    _votes, _votes.c.post_id == _posts.c.id)
+# soft-deleted posts, and posts of soft-deleted users, are never read back;
+# app/reaper.py purges them later
+_live = and_(_posts.c.deleted_at.is_(None), _users.c.deleted_at.is_(None))
+
+# Lists only read the preview stored in posts.content...
+_post_rows = select(*_columns, _posts.c.content, _posts.c.content_truncated).select_from(
+    _joined).where(_live).group_by(_posts.c.id, _posts.c.created_at, _users.c.id)
+# ...single post reads add the full content from post_bodies.
+_full_post_rows = select(
+    *_columns,
+    func.coalesce(_bodies.c.content, _posts.c.content).label("content"),
+    and_(_posts.c.content_truncated, _bodies.c.post_id.is_(None)).label("content_truncated"),
+).select_from(_joined.outerjoin(_bodies, _bodies.c.post_id == _posts.c.id)).where(_live).group_by(
+    _posts.c.id, _posts.c.created_at, _users.c.id, _bodies.c.post_id)
+
+LIST_POSTS = _post_rows.where(_posts.c.title.contains(bindparam("search"))).limit(
+    bindparam("limit")).offset(bindparam("skip"))
+GET_POST = _full_post_rows.where(_posts.c.id == bindparam("id"))
+GET_POSTS = _post_rows.where(_posts.c.id.in_(bindparam("ids", expanding=True)))
+
+
+def _post_out(row):
+    # the shape schemas.PostOut reads from (Post, votes, voted_by_me)
+    return {
+        "Post": {
+            "id": row.id, "title": row.title, "content": row.content, "published": row.published,
+            "created_at": row.created_at, "owner_id": row.owner_id,
+            "owner": {"id": row.owner_id, "email": row.owner_email, "created_at": row.owner_created_at},
+            "content_truncated": row.content_truncated,
+        },
+        "votes": row.votes,
+        "voted_by_me": row.voted_by_me,
+    }
+
+
+def _split_content(content: str):
+    # (what goes in posts.content, full text for post_bodies or None)
+    if len(content) <= settings.post_preview_chars:
+        return content, None
+    return content[:settings.post_preview_chars], content
+
+
+def _save_body(db: Session, post_id: int, body: Optional[str]):
+    db.query(models.PostBody).filter(models.PostBody.post_id == post_id).delete(synchronize_session=False)
+    if body is not None:
+        db.add(models.PostBody(post_id=post_id, content=body))
+
+
+def _with_content(post: models.Post, content: str):
+    # the author gets back what they sent, not the stored preview
+    return schemas.Post.model_validate(post).model_copy(update={"content": content, "content_truncated": False})
+
+
 # @router.get("/", response_model=List[schemas.Post])
 @router.get("/", response_model=List[schemas.PostOut])
 def get_posts(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user), limit: int = 10, skip: int = 0, search: Optional[str] = ""):
@@ -32,9 +110,23 @@ def get_posts(db: Session = Depends(get_db), current_user: int = Depends(oauth2.
     # posts = db.query(models.Post).filter(
     #     models.Post.title.contains(search)).limit(limit).offset(skip).all()
 
-    posts = db.query(models.Post, func.count(models.Vote.post_id).label("votes")).join(
-        models.Vote, models.Vote.post_id == models.Post.id, isouter=True).group_by(models.Post.id).filter(models.Post.title.contains(search)).limit(limit).offset(skip).all()
-    return posts
+    return _list_posts(db, current_user.id, limit, skip, search)
+
+
+def _list_posts(db: Session, user_id: int, limit: int, skip: int, search: str):
+    # also run by app/warmup.py so the statement is compiled before traffic
+    rows = db.execute(LIST_POSTS, {"user_id": user_id, "search": search, "limit": limit, "skip": skip})
+    return [_post_out(row) for row in rows]
+
+
+def _get_posts(db: Session, user_id: int, ids):
+    rows = db.execute(GET_POSTS, {"user_id": user_id, "ids": list(ids)})
+    return {row.id: _post_out(row) for row in rows}
+
+
+def _get_post(db: Session, user_id: int, id: int):
+    row = db.execute(GET_POST, {"user_id": user_id, "id": id}).first()
+    return _post_out(row) if row else None
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.Post)
@@ -45,12 +137,41 @@ def create_posts(post: schemas.PostCreate, db: Session = Depends(get_db), curren
 
     # conn.commit()
 
-    new_post = models.Post(owner_id=current_user.id, **post.dict())
+    data = post.dict()
+    preview, body = _split_content(data.pop("content"))
+    new_post = models.Post(owner_id=current_user.id, content=preview, content_truncated=body is not None, **data)
     db.add(new_post)
+    if body is not None:
+        db.flush()
+        _save_body(db, new_post.id, body)
+    stats.bump_user_stats(db, current_user.id, posts=1)
     db.commit()
     db.refresh(new_post)
 
-    return new_post
+    return _with_content(new_post, post.content)
+
+
+@router.get("/batch", response_model=List[schemas.PostBatchItem])
+def get_posts_batch(ids: str, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    """Fetch several posts by id (`?ids=1,2,3`) in one query.
+
+    Results come back in the requested order; ids that don't exist are
+    returned with `found: false` and no post. Like the list, long content
+    is returned as a preview (`content_truncated: true`).
+    """
+    try:
+        requested = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="ids must be a comma separated list of integers")
+    if not requested:
+        return []
+    if len(requested) > settings.batch_max_ids:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"at most {settings.batch_max_ids} ids can be fetched at once")
+
+    by_id = _get_posts(db, current_user.id, set(requested))
+    return [{"id": i, "found": i in by_id, "post": by_id.get(i)} for i in requested]
 
 
 @router.get("/{id}", response_model=schemas.PostOut)
@@ -59,8 +180,7 @@ def get_post(id: int, db: Session = Depends(get_db), current_user: int = Depends
     # post = cursor.fetchone()
     # post = db.query(models.Post).filter(models.Post.id == id).first()
 
-    post = db.query(models.Post, func.count(models.Vote.post_id).label("votes")).join(
-        models.Vote, models.Vote.post_id == models.Post.id, isouter=True).group_by(models.Post.id).filter(models.Post.id == id).first()
+    post = _get_post(db, current_user.id, id)
 
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -69,6 +189,76 @@ def get_post(id: int, db: Session = Depends(get_db), current_user: int = Depends
     return post
 
 
+def _live_count(db: Session, id: int):
+    """Vote count of a post that is still live, else None. Gives the pooled
+    connection back afterwards: the stream may stay open for hours."""
+    try:
+        post = db.query(models.Post.id).join(models.User, models.User.id == models.Post.owner_id).filter(
+            models.Post.id == id, models.Post.deleted_at.is_(None), models.User.deleted_at.is_(None)).first()
+        if not post:
+            return None
+        return db.query(func.count(models.Vote.post_id)).filter(models.Vote.post_id == id).scalar()
+    finally:
+        db.close()
+
+
+@router.get("/{id}/live")
+async def live_votes(id: int, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    """Stream the post's vote count as server-sent events.
+
+    Sends the current count on connect, then one `votes` event per change
+    (rapid changes are coalesced) and a comment heartbeat while idle. Votes
+    only publish +1/-1, which are applied to the count read here; the count
+    is read again every LIVE_RESYNC_SECONDS and whenever the broker may have
+    dropped updates, so a lost update never sticks.
+    """
+    if live.hub.is_full():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many live subscribers, try again later")
+    # subscribe before reading the count, so a vote committed in between
+    # isn't missed
+    sub = live.hub.subscribe(id)
+    try:
+        votes = await run_in_threadpool(_live_count, db, id)
+    except Exception:
+        live.hub.unsubscribe(sub)
+        raise
+    if votes is None:
+        live.hub.unsubscribe(sub)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"post with id: {id} was not found")
+
+    async def events():
+        try:
+            current = votes
+            synced = time.monotonic()
+            yield f"event: votes\ndata: {json.dumps({'post_id': id, 'votes': current})}\n\n"
+            while True:
+                delta = await sub.get(timeout=settings.live_heartbeat_seconds)
+                if sub.closed:
+                    # server shutting down; clients reconnect to another worker
+                    return
+                idle = delta is None
+                if sub.stale or time.monotonic() - synced >= settings.live_resync_seconds:
+                    sub.stale = False
+                    fresh = await run_in_threadpool(_live_count, db, id)
+                    synced = time.monotonic()
+                    if fresh is None:
+                        # deleted meanwhile
+                        return
+                    delta = fresh - current
+                if delta:
+                    current += delta
+                    yield f"event: votes\ndata: {json.dumps({'post_id': id, 'votes': current})}\n\n"
+                elif idle:
+                    yield ": ping\n\n"
+        finally:
+            live.hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_post(id: int, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
 
@@ -76,7 +266,7 @@ def delete_post(id: int, db: Session = Depends(get_db), current_user: int = Depe
     #     """DELETE FROM posts WHERE id = %s returning *""", (str(id),))
     # deleted_post = cursor.fetchone()
     # conn.commit()
-    post_query = db.query(models.Post).filter(models.Post.id == id)
+    post_query = db.query(models.Post).filter(models.Post.id == id, models.Post.deleted_at.is_(None))
 
     post = post_query.first()
 
@@ -88,7 +278,12 @@ def delete_post(id: int, db: Session = Depends(get_db), current_user: int = Depe
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="Not authorized to perform requested action")
 
-    post_query.delete(synchronize_session=False)
+    # Only mark it deleted: a popular post can have millions of votes, and
+    # deleting them here would hold the request and the locks for that long.
+    # app/reaper.py deletes its votes and body in batches, then the row (and
+    # takes the votes off votes_received as it goes).
+    post.deleted_at = datetime.now(timezone.utc)
+    stats.bump_user_stats(db, post.owner_id, posts=-1)
     db.commit()
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -103,7 +298,7 @@ def update_post(id: int, updated_post: schemas.PostCreate, db: Session = Depends
     # updated_post = cursor.fetchone()
     # conn.commit()
 
-    post_query = db.query(models.Post).filter(models.Post.id == id)
+    post_query = db.query(models.Post).filter(models.Post.id == id, models.Post.deleted_at.is_(None))
 
     post = post_query.first()
 
@@ -115,10 +310,14 @@ def update_post(id: int, updated_post: schemas.PostCreate, db: Session = Depends
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="Not authorized to perform requested action")
 
-    post_query.update(updated_post.dict(), synchronize_session=False)
+    data = updated_post.dict()
+    data["content"], body = _split_content(data["content"])
+    data["content_truncated"] = body is not None
+    post_query.update(data, synchronize_session=False)
+    _save_body(db, id, body)
 
     db.commit()
 
-    return post_query.first()
+    return _with_content(post_query.first(), updated_post.content)
 
 
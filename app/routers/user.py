@@ -1,7 +1,10 @@
+from datetime import datetime, timezone
+
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from .. import models, schemas, utils
+from .. import models, schemas, utils, oauth2
+from ..config import settings
 from ..database import get_db
 
 router = APIRouter(
@@ -41,7 +44,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 @router.get('/{id}', response_model=schemas.UserOut)
 def get_user(id: int, db: Session = Depends(get_db), ):
-    user = db.query(models.User).filter(models.User.id == id).first()
+    user = db.query(models.User).filter(models.User.id == id, models.User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"User with id: {id} does not exist")
@@ -49,7 +52,47 @@ def get_user(id: int, db: Session = Depends(get_db), ):
     return user
 
 
+@router.get('/{id}/stats', response_model=schemas.UserStats)
+def get_user_stats(id: int, db: Session = Depends(get_db)):
+    """Post count, votes received and latest posts of a user.
 
-
-
-
+    The counts come from the user_stats counters (one row lookup) and the
+    latest posts from the (owner_id, created_at) index, so this stays cheap
+    for users with any number of posts.
+    """
+    if not db.query(models.User.id).filter(models.User.id == id, models.User.deleted_at.is_(None)).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"User with id: {id} does not exist")
+    counters = db.query(models.UserStats).filter(models.UserStats.user_id == id).first()
+
+    recent = db.query(models.Post.id, models.Post.title, models.Post.content, models.Post.published,
+                      models.Post.created_at, models.Post.content_truncated).filter(
+        models.Post.owner_id == id, models.Post.deleted_at.is_(None)).order_by(
+        models.Post.created_at.desc()).limit(settings.user_stats_recent_posts).all()
+
+    return {
+        "id": id,
+        "post_count": counters.post_count if counters else 0,
+        "votes_received": counters.votes_received if counters else 0,
+        "recent_posts": recent,
+    }
+
+
+@router.delete('/{id}', status_code=status.HTTP_204_NO_CONTENT)
+def delete_user(id: int, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    """Delete your own account.
+
+    The account disappears right away (it can't log in, and neither it nor
+    its posts are returned anymore) and the email can be registered again.
+    Its posts and votes are purged in the background by app/reaper.py.
+    """
+    if id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Not authorized to perform requested action")
+
+    current_user.deleted_at = datetime.now(timezone.utc)
+    # access tokens already issued are refused by get_current_user
+    db.query(models.RefreshToken).filter(models.RefreshToken.user_id == id).delete(synchronize_session=False)
+    db.commit()
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
 from sqlalchemy.orm import Session
-from .. import schemas, database, models, oauth2
+from .. import schemas, database, models, oauth2, live, stats
 
 
 router = APIRouter(
@@ -12,7 +12,9 @@ router = APIRouter(
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def vote(vote: schemas.Vote, db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user)):
 
-    post = db.query(models.Post).filter(models.Post.id == vote.post_id).first()
+    # like the read routes, a post of a deleted user is gone too
+    post = db.query(models.Post).join(models.User, models.User.id == models.Post.owner_id).filter(
+        models.Post.id == vote.post_id, models.Post.deleted_at.is_(None), models.User.deleted_at.is_(None)).first()
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"Post with id: {vote.post_id} does not exist")
@@ -27,6 +29,9 @@ def vote(vote: schemas.Vote, db: Session = Depends(database.get_db), current_use
                                 detail=f"user {current_user.id} has alredy voted on post {vote.post_id}")
         new_vote = models.Vote(post_id=vote.post_id, user_id=current_user.id)
         db.add(new_vote)
+        stats.bump_user_stats(db, post.owner_id, votes=1)
+        # live subscribers (GET /posts/{id}/live) hear about it once this commits
+        live.hub.publish(db, vote.post_id, 1)
         db.commit()
         return {"message": "successfully added vote"}
     else:
@@ -35,6 +40,9 @@ def vote(vote: schemas.Vote, db: Session = Depends(database.get_db), current_use
                 status_code=status.HTTP_404_NOT_FOUND, detail="Vote does not exist")
 
         vote_query.delete(synchronize_session=False)
+        stats.bump_user_stats(db, post.owner_id, votes=-1)
+        live.hub.publish(db, vote.post_id, -1)
         db.commit()
 
-        return {"message": "successfully deleted vote"}
\ No newline at end of file
+        return {"message": "successfully deleted vote"}
+
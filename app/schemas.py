@@ -1,6 +1,8 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from .config import settings
 
 
 class PostBase(BaseModel):
@@ -10,7 +12,10 @@ class PostBase(BaseModel):
 
 
 class PostCreate(PostBase):
-    pass
+    # character limits; the request size in bytes is capped before parsing
+    # by BodySizeLimitMiddleware
+    title: str = Field(..., max_length=settings.post_title_max_length)
+    content: str = Field(..., max_length=settings.post_content_max_length)
 
 
 class UserOut(BaseModel):
@@ -27,6 +32,8 @@ class Post(PostBase):
     created_at: datetime
     owner_id: int
     owner: UserOut
+    # true when `content` is only a preview; GET /posts/{id} has it in full
+    content_truncated: bool = False
 
     class Config:
         from_attributes = True  # Updated
@@ -35,11 +42,37 @@ class Post(PostBase):
 class PostOut(BaseModel):
     Post: Post
     votes: int
+    voted_by_me: bool = False
 
     class Config:
         from_attributes = True  # Updated
 
 
+class PostBatchItem(BaseModel):
+    id: int
+    found: bool
+    post: Optional[PostOut] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PostSummary(PostBase):
+    id: int
+    created_at: datetime
+    content_truncated: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class UserStats(BaseModel):
+    id: int
+    post_count: int
+    votes_received: int
+    recent_posts: List[PostSummary]
+
+
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
@@ -53,10 +86,21 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 
 class TokenData(BaseModel):
      id: int | None = None
+     jti: Optional[str] = None
+     exp: Optional[int] = None
 
 
 class Vote(BaseModel):
@@ -0,0 +1,82 @@
+import math
+import os
+
+
+# Rough resident size of one worker (FastAPI + SQLAlchemy + pool) in MB, used
+# to keep the worker count within the container's memory limit.
+DEFAULT_WORKER_MEMORY_MB = 200
+
+# Database connections a worker holds outside its SQLAlchemy pool: the
+# readiness probe's and, with the postgres live broker, the LISTEN one.
+EXTRA_CONNECTIONS_PER_WORKER = 2
+
+
+def _read(path: str):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_count() -> int:
+    """CPUs this process may actually use: affinity mask and cgroup quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    # cgroup v2 "max 100000" / "200000 100000", cgroup v1 quota + period
+    quota = period = None
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")
+    if cpu_max:
+        q, _, p = cpu_max.partition(" ")
+        if q != "max":
+            quota, period = int(q), int(p or 100000)
+    else:
+        q = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        p = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if q and p and int(q) > 0:
+            quota, period = int(q), int(p)
+    if quota and period:
+        count = min(count, max(1, math.ceil(quota / period)))
+    return max(1, count)
+
+
+def memory_limit_bytes():
+    """Memory available to the container (cgroup limit, else physical RAM)."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        value = _read(path)
+        # cgroup v1 reports "no limit" as a huge number
+        if value and value != "max" and int(value) < 1 << 60:
+            return int(value)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def worker_count(cpus: int = None, memory_bytes: int = None,
+                 worker_memory_mb: int = DEFAULT_WORKER_MEMORY_MB) -> int:
+    """Gunicorn's 2 * cores + 1 rule, capped by what fits in memory.
+
+    Async uvicorn workers don't block on I/O, so the usual formula is an upper
+    bound; the memory cap matters more on small hosting plans.
+    """
+    cpus = cpus if cpus is not None else cpu_count()
+    memory_bytes = memory_bytes if memory_bytes is not None else memory_limit_bytes()
+    workers = 2 * cpus + 1
+    if memory_bytes:
+        workers = min(workers, memory_bytes // (worker_memory_mb * 1024 * 1024))
+    return max(1, workers)
+
+
+def db_pool_size(max_connections: int, workers: int):
+    """(pool_size, max_overflow) per worker so that `workers` workers stay
+    within `max_connections` database connections in total, extras included.
+
+    A third of each worker's share is kept open, the rest is overflow.
+    """
+    per_worker = max(1, max_connections // workers - EXTRA_CONNECTIONS_PER_WORKER)
+    pool_size = max(1, per_worker // 3)
+    return pool_size, per_worker - pool_size
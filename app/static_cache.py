@@ -0,0 +1,148 @@
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import threading
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+from .compression import available_encodings, compress, negotiate_encoding, COMPRESSIBLE_TYPES
+
+
+# Files whose name carries a content hash (app.3f9a1c2b.js, logo-3f9a1c2b.svg)
+# never change under the same URL, so browsers may cache them forever.
+FINGERPRINT_RE = re.compile(r"[.-][0-9a-f]{8,}\.[a-z0-9]+$", re.IGNORECASE)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# Highest sensible levels: variants are built once per file version, not per
+# request, and off the event loop (see CachedStaticFiles.lookup_path).
+PRECOMPRESS_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+
+
+class CachedAsset:
+    """A file held in memory together with its precompressed variants."""
+
+    def __init__(self, path: str, body: bytes, mtime_ns: int, size: int, media_type: str):
+        self.path = path
+        self.body = body
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.media_type = media_type
+        # strong ETag: derived from the bytes, not from mtime/size
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.variants = {}
+        # each encoding is a different representation, so it gets its own
+        # strong ETag (RFC 9110 8.8.3)
+        self.etags = {None: self.etag}
+        if media_type.startswith(COMPRESSIBLE_TYPES):
+            for encoding in available_encodings():
+                data = compress(body, encoding, PRECOMPRESS_LEVELS[encoding])
+                if len(data) < len(body):
+                    self.variants[encoding] = data
+                    self.etags[encoding] = f'"{digest}-{encoding}"'
+
+
+class AssetCache:
+    """Path -> CachedAsset cache, reloading an entry when its mtime or size changes.
+
+    With `check_mtime=False` files are read once and never re-checked, which
+    saves the stat() call per request in immutable deployments.
+    """
+
+    def __init__(self, check_mtime: bool = True, max_file_size: int = 1024 * 1024):
+        self.check_mtime = check_mtime
+        self.max_file_size = max_file_size
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def cached(self, path: str):
+        """The cached asset if it is up to date, else None. Never reads or
+        compresses a file, so it is safe to call on the event loop."""
+        asset = self._assets.get(path)
+        if asset is None or not self.check_mtime:
+            return asset
+        stat_result = os.stat(path)
+        if asset.mtime_ns == stat_result.st_mtime_ns and asset.size == stat_result.st_size:
+            return asset
+        return None
+
+    def get(self, path: str, stat_result: os.stat_result = None):
+        """Like cached(), but (re)loads the file when needed. That reads and
+        compresses it, which can take a second for a large file: call it from
+        a worker thread when serving requests."""
+        asset = self._assets.get(path)
+        if asset is not None and not self.check_mtime:
+            return asset
+
+        if stat_result is None:
+            stat_result = os.stat(path)
+        if asset is not None and asset.mtime_ns == stat_result.st_mtime_ns and asset.size == stat_result.st_size:
+            return asset
+        if stat_result.st_size > self.max_file_size:
+            return None
+
+        with self._lock:
+            with open(path, "rb") as f:
+                body = f.read()
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if media_type.startswith("text/"):
+                media_type += "; charset=utf-8"
+            asset = CachedAsset(path, body, stat_result.st_mtime_ns, stat_result.st_size, media_type)
+            self._assets[path] = asset
+        return asset
+
+
+def asset_response(asset: CachedAsset, request_headers: Headers, method: str = "GET", status_code: int = 200):
+    """Build a response for `asset`, honouring If-None-Match and Accept-Encoding."""
+    cache_control = IMMUTABLE_CACHE_CONTROL if FINGERPRINT_RE.search(asset.path) else REVALIDATE_CACHE_CONTROL
+    encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), list(asset.variants))
+    headers = {"etag": asset.etags[encoding], "cache-control": cache_control}
+    if asset.variants:
+        headers["vary"] = "Accept-Encoding"
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and status_code == 200:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        if asset.etags[encoding] in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+    body = asset.body
+    if encoding is not None:
+        body = asset.variants[encoding]
+        headers["content-encoding"] = encoding
+
+    if method == "HEAD":
+        headers["content-length"] = str(len(body))
+        body = b""
+    return Response(content=body, status_code=status_code, headers=headers, media_type=asset.media_type)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles serving from an in-memory AssetCache with precompressed variants.
+
+    Files larger than the cache's `max_file_size` fall back to the regular
+    streaming FileResponse.
+    """
+
+    def __init__(self, *args, cache: AssetCache = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache or AssetCache()
+
+    def lookup_path(self, path):
+        # StaticFiles runs this in a worker thread and file_response() on the
+        # event loop, so (re)load and compress the file here
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            self.cache.get(full_path, stat_result)
+        return full_path, stat_result
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        asset = self.cache.get(os.fspath(full_path), stat_result)
+        if asset is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return asset_response(asset, Headers(scope=scope), scope["method"], status_code)
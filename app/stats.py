@@ -0,0 +1,61 @@
+"""Per-user counters for GET /users/{id}/stats.
+
+post_count and votes_received live in user_stats and are adjusted in the
+same transaction as the post or vote change, so reading them is a primary
+key lookup however many posts a user has. rebuild_user_stats() recomputes
+them from posts and votes in case they ever drift (run by
+scripts/rebuild_user_stats.py).
+"""
+from sqlalchemy import text
+
+from . import models
+from .database import insert
+
+
+def bump_user_stats(db, user_id: int, posts: int = 0, votes: int = 0):
+    """Add to a user's counters, creating their row if needed. The caller commits."""
+    table = models.UserStats.__table__
+    # a Session, or a Connection (app/reaper.py)
+    bind = db.get_bind() if hasattr(db, "get_bind") else db
+    stmt = insert(table, bind).values(user_id=user_id, post_count=posts, votes_received=votes)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"post_count": table.c.post_count + stmt.excluded.post_count,
+              "votes_received": table.c.votes_received + stmt.excluded.votes_received},
+    ))
+
+
+def rebuild_user_stats(conn, batch_size: int = 1000):
+    """Recompute every user's counters, `batch_size` users per transaction.
+
+    Each batch locks user_stats against writers while it runs, so a post or
+    vote made concurrently is either counted by the rebuild or applied on
+    top of it, never lost. Returns the number of users rebuilt.
+    """
+    rebuilt = 0
+    last_id = 0
+    while True:
+        ids = conn.execute(text("SELECT id FROM users WHERE id > :last ORDER BY id LIMIT :n"),
+                           {"last": last_id, "n": batch_size}).scalars().all()
+        if not ids:
+            return rebuilt
+        try:
+            conn.execute(text("LOCK TABLE user_stats IN SHARE ROW EXCLUSIVE MODE"))
+            conn.execute(text("""
+                INSERT INTO user_stats (user_id, post_count, votes_received)
+                SELECT u.id, coalesce(p.n, 0), coalesce(v.n, 0) FROM users u
+                LEFT JOIN (SELECT owner_id, count(*) AS n FROM posts
+                           WHERE owner_id BETWEEN :lo AND :hi AND deleted_at IS NULL
+                           GROUP BY owner_id) p ON p.owner_id = u.id
+                LEFT JOIN (SELECT posts.owner_id, count(*) AS n FROM votes JOIN posts ON posts.id = votes.post_id
+                           WHERE posts.owner_id BETWEEN :lo AND :hi GROUP BY posts.owner_id) v ON v.owner_id = u.id
+                WHERE u.id BETWEEN :lo AND :hi
+                ON CONFLICT (user_id) DO UPDATE
+                SET post_count = EXCLUDED.post_count, votes_received = EXCLUDED.votes_received
+            """), {"lo": ids[0], "hi": ids[-1]})
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        rebuilt += len(ids)
+        last_id = ids[-1]
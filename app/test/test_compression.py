@@ -0,0 +1,66 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100, encodings=["gzip"])
+
+
+@app.get("/small")
+def small():
+  return PlainTextResponse("tiny")
+
+
+@app.get("/large")
+def large():
+  return PlainTextResponse("x" * 1000)
+
+
+@app.get("/stream")
+def stream():
+  def chunks():
+    for _ in range(10):
+      yield "chunk " * 50
+  return StreamingResponse(chunks(), media_type="text/plain")
+
+
+client = TestClient(app)
+
+
+def test_negotiate_encoding():
+  assert negotiate_encoding("gzip, br", ["zstd", "br", "gzip"]) == "br"
+  assert negotiate_encoding("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+  assert negotiate_encoding("*", ["zstd", "gzip"]) == "zstd"
+  assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+  assert negotiate_encoding("", ["gzip"]) is None
+
+
+def test_small_body_not_compressed():
+  res = client.get("/small", headers={"Accept-Encoding": "gzip"})
+  assert "content-encoding" not in res.headers
+  assert res.text == "tiny"
+
+
+def test_large_body_compressed():
+  res = client.get("/large", headers={"Accept-Encoding": "gzip"})
+  assert res.headers["content-encoding"] == "gzip"
+  assert res.headers["vary"] == "Accept-Encoding"
+  assert res.text == "x" * 1000
+
+
+def test_identity_when_not_accepted():
+  res = client.get("/large", headers={"Accept-Encoding": "identity"})
+  assert "content-encoding" not in res.headers
+
+
+def test_streaming_body_compressed():
+  with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as res:
+    assert res.headers["content-encoding"] == "gzip"
+    assert "content-length" not in res.headers
+    raw = b"".join(res.iter_raw())
+  assert gzip.decompress(raw) == ("chunk " * 50 * 10).encode()
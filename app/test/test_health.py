@@ -0,0 +1,49 @@
+from fastapi.testclient import TestClient
+
+from app import health
+from app.main import app
+
+
+def test_liveness_does_no_io(monkeypatch):
+  def fail(*args, **kwargs):
+    raise AssertionError("liveness touched the database")
+
+  monkeypatch.setattr(health.DatabaseCheck, "check", fail)
+  monkeypatch.setattr(health.DatabaseCheck, "_run", fail)
+  response = TestClient(app).get("/health")
+  assert response.status_code == 200
+  assert response.json() == {"status": "ok"}
+
+
+def test_database_check_is_cached():
+  check = health.DatabaseCheck("sqlite://", interval_seconds=60)
+  assert check.stale()
+  check.check()
+  first = check.checked_at
+  assert check.ok and not check.stale()
+
+  check.check()
+  assert check.checked_at == first
+  check.close()
+
+
+def test_database_check_reports_failures():
+  check = health.DatabaseCheck("sqlite:////nonexistent/dir/db.sqlite", interval_seconds=0)
+  check.check()
+  assert check.ok is False
+  assert check.error.startswith("OperationalError")
+  check.close()
+
+
+def test_pool_report():
+  from sqlalchemy import create_engine
+  from sqlalchemy.pool import QueuePool
+
+  assert health.pool_report(None) == {"created": False}
+  engine = create_engine("sqlite:///:memory:", poolclass=QueuePool, pool_size=2, max_overflow=1)
+  connections = [engine.connect() for _ in range(3)]
+  report = health.pool_report(engine)
+  assert (report["size"], report["checked_out"], report["overflow"], report["saturation"]) == (2, 3, 1, 1.5)
+  for conn in connections:
+    conn.close()
+  engine.dispose()
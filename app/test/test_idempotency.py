@@ -0,0 +1,75 @@
+import asyncio
+import itertools
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.idempotency import IdempotencyMiddleware, MemoryBackend, encode_record, decode_record
+
+
+counter = itertools.count(1)
+
+app = FastAPI()
+app.add_middleware(IdempotencyMiddleware, backend=MemoryBackend(), paths=["/items/"])
+
+
+@app.post("/items/", status_code=201)
+async def create_item(item: dict):
+  await asyncio.sleep(0.1)
+  return {"id": next(counter), **item}
+
+
+client = TestClient(app)
+
+
+def test_record_roundtrip():
+  record = encode_record(201, "application/json", b'{"id": 1}')
+  assert decode_record(record) == (201, "application/json", b'{"id": 1}')
+
+
+def test_retry_is_replayed():
+  headers = {"Idempotency-Key": "abc", "Authorization": "Bearer one"}
+  first = client.post("/items/", json={"name": "a"}, headers=headers)
+  second = client.post("/items/", json={"name": "a"}, headers=headers)
+  assert first.status_code == second.status_code == 201
+  assert first.json() == second.json()
+  assert second.headers["idempotent-replayed"] == "true"
+
+
+def test_key_is_scoped_per_caller_and_body():
+  first = client.post("/items/", json={"name": "b"}, headers={"Idempotency-Key": "k", "Authorization": "Bearer one"})
+  other_user = client.post("/items/", json={"name": "b"}, headers={"Idempotency-Key": "k", "Authorization": "Bearer two"})
+  assert first.json()["id"] != other_user.json()["id"]
+
+  reused = client.post("/items/", json={"name": "c"}, headers={"Idempotency-Key": "k", "Authorization": "Bearer one"})
+  assert reused.status_code == 422
+
+
+def test_key_survives_token_refresh():
+  from app.oauth2 import create_access_token
+
+  def post(token):
+    return client.post("/items/", json={"name": "e"},
+                       headers={"Idempotency-Key": "refresh", "Authorization": f"Bearer {token}"})
+
+  first = post(create_access_token({"user_id": 1}))
+  # the client refreshed its access token before retrying
+  retry = post(create_access_token({"user_id": 1}))
+  assert retry.headers["idempotent-replayed"] == "true"
+  assert retry.json() == first.json()
+
+  other_user = post(create_access_token({"user_id": 2}))
+  assert other_user.json()["id"] != first.json()["id"]
+
+
+def test_concurrent_duplicates_run_once():
+  import httpx
+
+  async def scenario():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+      headers = {"Idempotency-Key": "concurrent"}
+      return await asyncio.gather(*[ac.post("/items/", json={"name": "d"}, headers=headers) for _ in range(5)])
+
+  responses = asyncio.run(scenario())
+  assert len({r.json()["id"] for r in responses}) == 1
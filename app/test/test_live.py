@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.live import VoteHub
+
+
+def _vote(hub, post_id, delta, commit=True):
+  # what the vote route does: publish inside the transaction, then commit
+  db = Session()
+  hub.publish(db, post_id, delta)
+  db.commit() if commit else db.rollback()
+  db.close()
+
+
+def test_updates_are_coalesced():
+  async def scenario():
+    hub = VoteHub()
+    sub = hub.subscribe(1)
+    for _ in range(5):
+      _vote(hub, 1, 1)
+    _vote(hub, 1, -1)
+    assert await sub.get(timeout=1) == 4
+    # nothing else queued behind the coalesced value
+    assert await sub.get(timeout=0.05) is None
+  asyncio.run(scenario())
+
+
+def test_publish_from_worker_thread():
+  async def scenario():
+    hub = VoteHub()
+    sub = hub.subscribe(7)
+    thread = threading.Thread(target=_vote, args=(hub, 7, 1))
+    thread.start()
+    assert await sub.get(timeout=1) == 1
+    thread.join()
+    assert not hub.has_listeners(8)
+    hub.unsubscribe(sub)
+    assert hub.subscriber_count == 0
+  asyncio.run(scenario())
+
+
+def test_10k_idle_subscribers():
+  async def scenario():
+    hub = VoteHub(max_subscribers=10000)
+    tracemalloc.start()
+    subs = [hub.subscribe(i % 100) for i in range(10000)]
+    waiters = [asyncio.ensure_future(sub.get(timeout=5)) for sub in subs]
+    await asyncio.sleep(0)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert hub.is_full()
+    # idle subscribers, each parked on a waiting task, stay cheap
+    assert current / len(subs) < 4096
+
+    for post_id in range(100):
+      _vote(hub, post_id, 1)
+    results = await asyncio.gather(*waiters)
+    assert results == [1] * 10000
+  asyncio.run(scenario())
+
+
+def test_rolled_back_votes_are_not_published():
+  async def scenario():
+    hub = VoteHub()
+    sub = hub.subscribe(3)
+    _vote(hub, 3, 1, commit=False)
+    _vote(hub, 3, -1)
+    assert await sub.get(timeout=1) == -1
+  asyncio.run(scenario())
+
+
+def test_close_ends_streams(client, session, monkeypatch, auth_headers):
+  from app import live
+  from app.routers.post import live_votes
+
+  monkeypatch.setattr(live, "hub", VoteHub())
+  headers = auth_headers("live@gmail.com")
+  post = client.post("/posts/", json={"title": "live", "content": "c"}, headers=headers).json()
+
+  async def scenario():
+    response = await live_votes(post["id"], db=session, current_user=None)
+    events = response.body_iterator
+    await events.__anext__()
+    # what the worker does when shutdown starts
+    live.hub.close()
+    with pytest.raises(StopAsyncIteration):
+      await events.__anext__()
+    assert live.hub.subscriber_count == 0
+  asyncio.run(scenario())
+
+
+def test_stream_resyncs_lost_updates(client, session, monkeypatch, auth_headers):
+  from app import live, models
+  from app.routers.post import live_votes
+
+  monkeypatch.setattr(live, "hub", VoteHub())
+  headers = auth_headers("live@gmail.com")
+  post = client.post("/posts/", json={"title": "live", "content": "c"}, headers=headers).json()
+
+  async def scenario():
+    response = await live_votes(post["id"], db=session, current_user=None)
+    events = response.body_iterator
+    assert '"votes": 0' in await events.__anext__()
+
+    session.add(models.Vote(post_id=post["id"], user_id=post["owner_id"]))
+    live.hub.publish(session, post["id"], 1)
+    session.commit()
+    assert '"votes": 1' in await events.__anext__()
+
+    # an update the broker dropped (e.g. while reconnecting) is picked up
+    # by the resync
+    session.query(models.Vote).delete()
+    session.commit()
+    live.hub._resync()
+    assert '"votes": 0' in await events.__anext__()
+
+    session.query(models.Post).filter(models.Post.id == post["id"]).update(
+      {"deleted_at": datetime.now(timezone.utc)})
+    session.commit()
+    live.hub._resync()
+    with pytest.raises(StopAsyncIteration):
+      await events.__anext__()
+    assert live.hub.subscriber_count == 0
+  asyncio.run(scenario())
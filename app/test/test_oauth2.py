@@ -0,0 +1,64 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.oauth2 import RevocationList, create_access_token, verify_access_token
+
+
+def test_access_tokens_carry_a_unique_jti():
+  error = HTTPException(status_code=401)
+  first = verify_access_token(create_access_token({"user_id": 1}), error)
+  second = verify_access_token(create_access_token({"user_id": 1}), error)
+  assert first.id == 1 and first.exp
+  assert first.jti and first.jti != second.jti
+
+
+def test_tampered_token_is_rejected():
+  token = create_access_token({"user_id": 1})
+  with pytest.raises(HTTPException):
+    verify_access_token(token[:-2] + "xx", HTTPException(status_code=401))
+
+
+def test_revocation_list_drops_expired_entries():
+  revocations = RevocationList()
+  revocations.add("live", time.time() + 60)
+  revocations.add("stale", time.time() - 1)
+  assert revocations.is_revoked("live") and revocations.is_revoked("stale")
+
+  revocations.prune()
+  assert revocations.is_revoked("live")
+  assert not revocations.is_revoked("stale")
+  assert len(revocations) == 1
+
+
+def test_refresh_rotates_and_reuse_revokes_the_family(client, login):
+  tokens = login("refresh@gmail.com")
+  assert tokens["refresh_token"]
+
+  res = client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+  assert res.status_code == 200
+  rotated = res.json()
+  assert rotated["refresh_token"] != tokens["refresh_token"]
+  assert client.get("/posts/", headers={"Authorization": f"Bearer {rotated['access_token']}"}).status_code == 200
+
+  # the old refresh token was already used: it looks stolen, so the whole
+  # family goes, including the token that replaced it
+  assert client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+  assert client.post("/token/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+
+def test_unknown_refresh_token_is_rejected(client):
+  assert client.post("/token/refresh", json={"refresh_token": "nope"}).status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, login):
+  tokens = login("logout@gmail.com")
+  headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+  assert client.get("/posts/", headers=headers).status_code == 200
+
+  res = client.post("/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+  assert res.status_code == 204
+  assert client.get("/posts/", headers=headers).status_code == 401
+  assert client.post("/logout", headers=headers).status_code == 401
+  assert client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app import schemas
+from app.routers.post import GET_POST, GET_POSTS, LIST_POSTS, _post_out
+
+
+def test_read_statements_only_take_bound_parameters():
+  for statement, params in ((LIST_POSTS, {"user_id", "search", "limit", "skip"}),
+                            (GET_POST, {"user_id", "id"}),
+                            (GET_POSTS, {"user_id", "ids"})):
+    compiled = statement.compile(dialect=postgresql.dialect())
+    # everything the caller supplies is a placeholder (the rest are constants)
+    assert {name for name, value in compiled.params.items() if value is None} == params
+
+
+def test_post_out_matches_the_orm_shape():
+  now = datetime.now(timezone.utc)
+  row = SimpleNamespace(id=1, title="t", content="c", published=True, created_at=now, owner_id=2,
+                        owner_email="a@example.com", owner_created_at=now, votes=3, voted_by_me=True,
+                        content_truncated=False)
+  out = schemas.PostOut.model_validate(_post_out(row))
+  assert out.Post.owner.email == "a@example.com"
+  assert out.votes == 3 and out.voted_by_me
@@ -0,0 +1,28 @@
+from app.config import settings
+
+
+def test_batch_keeps_requested_order(client, auth_headers):
+  headers = auth_headers("batch@gmail.com")
+  ids = [client.post("/posts/", json={"title": f"p{i}", "content": "c"}, headers=headers).json()["id"]
+         for i in range(3)]
+  missing = max(ids) + 1000
+
+  requested = [ids[2], missing, ids[0], ids[2]]
+  res = client.get("/posts/batch", params={"ids": ",".join(map(str, requested))}, headers=headers)
+  assert res.status_code == 200
+  items = res.json()
+  assert [(item["id"], item["found"]) for item in items] == [
+    (ids[2], True), (missing, False), (ids[0], True), (ids[2], True)]
+  assert items[1]["post"] is None
+  assert [item["post"]["Post"]["id"] for item in items if item["found"]] == [ids[2], ids[0], ids[2]]
+
+
+def test_batch_rejects_bad_ids(client, auth_headers):
+  headers = auth_headers("batch2@gmail.com")
+  res = client.get("/posts/batch", params={"ids": "1,two"}, headers=headers)
+  assert res.status_code == 422
+
+  too_many = ",".join(str(i) for i in range(settings.batch_max_ids + 1))
+  res = client.get("/posts/batch", params={"ids": too_many}, headers=headers)
+  assert res.status_code == 422
+  assert str(settings.batch_max_ids) in res.json()["detail"]
@@ -0,0 +1,59 @@
+from app import models
+from app.reaper import reap
+
+
+def _stats(client, user_id):
+  stats = client.get(f"/users/{user_id}/stats").json()
+  return stats["post_count"], stats["votes_received"]
+
+
+def test_deleted_post_is_hidden_then_purged(client, auth_headers, session):
+  author = auth_headers("author@gmail.com")
+  voters = [auth_headers(f"voter{i}@gmail.com") for i in range(3)]
+  post = client.post("/posts/", json={"title": "gone", "content": "x" * 600}, headers=author).json()
+  for headers in voters:
+    client.post("/vote/", json={"post_id": post["id"], "dir": 1}, headers=headers)
+
+  assert client.delete(f"/posts/{post['id']}", headers=author).status_code == 204
+  assert client.get(f"/posts/{post['id']}", headers=author).status_code == 404
+  assert client.get("/posts/", headers=author).json() == []
+  assert client.post("/vote/", json={"post_id": post["id"], "dir": 1}, headers=author).status_code == 404
+  # the votes are still there until the reaper runs
+  assert _stats(client, post["owner_id"]) == (0, 3)
+  assert session.query(models.Vote).count() == 3
+
+  # two votes per transaction
+  assert reap(session, batch_size=2) == 1
+  assert session.query(models.Vote).count() == 0
+  assert session.query(models.Post).count() == 0
+  assert session.query(models.PostBody).count() == 0
+  assert _stats(client, post["owner_id"]) == (0, 0)
+  assert reap(session) == 0
+
+
+def test_deleted_user_is_hidden_then_purged(client, auth_headers, session):
+  leaving = auth_headers("leaving@gmail.com")
+  staying = auth_headers("staying@gmail.com")
+  theirs = client.post("/posts/", json={"title": "theirs", "content": "a"}, headers=leaving).json()
+  mine = client.post("/posts/", json={"title": "mine", "content": "b"}, headers=staying).json()
+  client.post("/vote/", json={"post_id": theirs["id"], "dir": 1}, headers=staying)
+  client.post("/vote/", json={"post_id": mine["id"], "dir": 1}, headers=leaving)
+  user_id = theirs["owner_id"]
+
+  assert client.delete(f"/users/{mine['owner_id']}", headers=leaving).status_code == 403
+  assert client.delete(f"/users/{user_id}", headers=leaving).status_code == 204
+  assert client.get(f"/users/{user_id}").status_code == 404
+  assert client.get("/posts/", headers=leaving).status_code == 401
+  assert [p["Post"]["id"] for p in client.get("/posts/", headers=staying).json()] == [mine["id"]]
+  # their posts are gone before the reaper gets to them
+  assert client.get(f"/posts/{theirs['id']}", headers=staying).status_code == 404
+  assert client.get(f"/posts/{theirs['id']}/live", headers=staying).status_code == 404
+  assert client.post("/vote/", json={"post_id": theirs["id"], "dir": 1}, headers=staying).status_code == 404
+  # the email is free again
+  assert client.post("/users/", json={"email": "leaving@gmail.com", "password": "x"}).status_code == 201
+
+  reap(session, batch_size=1)
+  assert session.query(models.User).filter(models.User.id == user_id).first() is None
+  assert session.query(models.Post).filter(models.Post.owner_id == user_id).count() == 0
+  assert session.query(models.Vote).count() == 0
+  assert _stats(client, mine["owner_id"]) == (1, 0)
@@ -0,0 +1,24 @@
+from app.server import worker_count, cpu_count, db_pool_size, EXTRA_CONNECTIONS_PER_WORKER
+
+
+def test_worker_count_uses_cpu_formula():
+  assert worker_count(cpus=2, memory_bytes=64 * 1024 ** 3) == 5
+
+
+def test_worker_count_capped_by_memory():
+  # 512MB at 200MB per worker leaves room for two
+  assert worker_count(cpus=8, memory_bytes=512 * 1024 ** 2, worker_memory_mb=200) == 2
+  assert worker_count(cpus=8, memory_bytes=100 * 1024 ** 2, worker_memory_mb=200) == 1
+
+
+def test_cpu_count_positive():
+  assert cpu_count() >= 1
+
+
+def test_db_pool_size_fits_budget():
+  for max_connections, workers in ((100, 5), (97, 9), (20, 3), (5, 4)):
+    pool_size, max_overflow = db_pool_size(max_connections, workers)
+    assert pool_size >= 1 and max_overflow >= 0
+    if max_connections // workers > EXTRA_CONNECTIONS_PER_WORKER:
+      assert workers * (pool_size + max_overflow + EXTRA_CONNECTIONS_PER_WORKER) <= max_connections
+  assert db_pool_size(100, 5) == (6, 12)
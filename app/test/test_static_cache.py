@@ -0,0 +1,70 @@
+import gzip
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.static_cache import AssetCache, CachedStaticFiles, IMMUTABLE_CACHE_CONTROL
+
+
+def make_client(directory):
+  app = FastAPI()
+  app.mount("/static", CachedStaticFiles(directory=str(directory), cache=AssetCache()), name="static")
+  return TestClient(app)
+
+
+def test_precompressed_variant_and_etag(tmp_path):
+  (tmp_path / "page.html").write_text("<p>hello</p>" * 200)
+  client = make_client(tmp_path)
+
+  res = client.get("/static/page.html", headers={"Accept-Encoding": "gzip"})
+  assert res.status_code == 200
+  assert res.headers["content-encoding"] == "gzip"
+  assert res.headers["etag"].startswith('"')
+  assert res.text == "<p>hello</p>" * 200
+
+  gzip_etag = res.headers["etag"]
+  assert gzip_etag.endswith('-gzip"')
+  assert res.headers["vary"] == "Accept-Encoding"
+
+  res = client.get("/static/page.html", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+  assert res.status_code == 304
+
+  # the identity body is a different representation with its own validator
+  res = client.get("/static/page.html", headers={"Accept-Encoding": "identity", "If-None-Match": gzip_etag})
+  assert res.status_code == 200
+  assert "content-encoding" not in res.headers
+  assert res.headers["etag"] != gzip_etag
+
+
+def test_fingerprinted_file_is_immutable(tmp_path):
+  (tmp_path / "app.3f9a1c2b.js").write_text("console.log(1)")
+  (tmp_path / "app.js").write_text("console.log(1)")
+  client = make_client(tmp_path)
+
+  assert client.get("/static/app.3f9a1c2b.js").headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+  assert "immutable" not in client.get("/static/app.js").headers["cache-control"]
+
+
+def test_reload_on_mtime_change(tmp_path):
+  path = tmp_path / "index.html"
+  path.write_text("one")
+  cache = AssetCache()
+  assert cache.get(str(path)).body == b"one"
+
+  path.write_text("two!")
+  stat = os.stat(path)
+  os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+  assert cache.get(str(path)).body == b"two!"
+
+
+def test_cached_never_loads(tmp_path):
+  path = tmp_path / "index.html"
+  path.write_text("one")
+  cache = AssetCache(check_mtime=True)
+  assert cache.cached(str(path)) is None
+  asset = cache.get(str(path))
+  assert cache.cached(str(path)) is asset
+
+  path.write_text("two!")
+  assert cache.cached(str(path)) is None
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.stats import bump_user_stats
+
+
+class RecordingSession:
+  def __init__(self):
+    self.statements = []
+
+  def get_bind(self):
+    return SimpleNamespace(dialect=postgresql.dialect())
+
+  def execute(self, statement):
+    self.statements.append(statement)
+
+
+def test_bump_is_a_single_relative_upsert():
+  db = RecordingSession()
+  bump_user_stats(db, 7, posts=-1, votes=-3)
+  assert len(db.statements) == 1
+  sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+  assert "ON CONFLICT (user_id) DO UPDATE" in sql
+  # adds to the stored value instead of overwriting it
+  assert "post_count = (user_stats.post_count + excluded.post_count)" in sql
+  assert "votes_received = (user_stats.votes_received + excluded.votes_received)" in sql
@@ -1,44 +1,53 @@
-from fastapi.testclient import TestClient
-import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-from app.main import app
 from app import schemas
-from app.config import settings
-from app.database import get_db
-from app.database import Base
-
-
-SQLALCHEMY_DATABASE_URL = f'postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}_test'
-
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-
-TestingSessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
-Base.metadata.create_all(bind=engine)
-Base = declarative_base()
-def override_get_db():
-  db = TestingSessionLocal()
-  try:
-    yield db
-  finally:
-    db.close()
-app.dependency_overrides[get_db] = override_get_db
-
-client = TestClient(app)
-@pytest.fuxture
-def client():
-  return TestClient(app)
-
-def test_root():
-  def root():
-    client.get("/")
-    res = client.get("/")
-    print(res.json().get('message'))
-  
-def test_creat_user():
+
+
+def test_root(client):
+  res = client.get("/")
+  assert res.status_code == 200
+
+
+def test_creat_user(client):
   res = client.post(
-    "/users/",json={"email": "hello123@gmail.com", "password": "password123"})
+    "/users/", json={"email": "hello123@gmail.com", "password": "password123"})
   new_user = schemas.UserOut(**res.json())
   assert new_user.email == "hello123@gmail.com"
   assert res.status_code == 201
+
+
+def test_login_and_read_posts(client, auth_headers):
+  headers = auth_headers("reader@gmail.com")
+
+  post = client.post("/posts/", json={"title": "first", "content": "hello"}, headers=headers).json()
+  assert client.post("/vote/", json={"post_id": post["id"], "dir": 1}, headers=headers).status_code == 201
+
+  posts = client.get("/posts/", headers=headers).json()
+  assert [(p["Post"]["id"], p["votes"], p["voted_by_me"]) for p in posts] == [(post["id"], 1, True)]
+  stats = client.get(f"/users/{post['owner_id']}/stats").json()
+  assert (stats["post_count"], stats["votes_received"]) == (1, 1)
+
+
+def test_users_are_rolled_back_between_tests(client):
+  # test_creat_user's user is gone, so the same email can register again
+  res = client.post(
+    "/users/", json={"email": "hello123@gmail.com", "password": "password123"})
+  assert res.status_code == 201
+
+
+def test_long_content_is_previewed_in_lists(client, auth_headers):
+  from app.config import settings
+
+  headers = auth_headers("writer@gmail.com")
+  content = "x" * (settings.post_preview_chars + 10)
+
+  created = client.post("/posts/", json={"title": "long", "content": content}, headers=headers).json()
+  assert created["content"] == content
+
+  listed = client.get("/posts/", headers=headers).json()[0]["Post"]
+  assert listed["content"] == content[:settings.post_preview_chars]
+  assert listed["content_truncated"] is True
+  full = client.get(f"/posts/{created['id']}", headers=headers).json()["Post"]
+  assert full["content"] == content and full["content_truncated"] is False
+
+  res = client.post("/posts/", json={"title": "huge", "content": "x" * (settings.max_request_body_bytes + 1)},
+                    headers=headers)
+  assert res.status_code == 413
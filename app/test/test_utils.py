@@ -0,0 +1,27 @@
+from app.utils import build_pwd_context
+
+
+def test_legacy_bcrypt_hash_is_upgraded():
+  legacy = build_pwd_context(["bcrypt"], bcrypt_rounds=4)
+  current = build_pwd_context(["argon2", "bcrypt"], argon2_memory_cost=1024, argon2_time_cost=1,
+                              argon2_parallelism=1, bcrypt_rounds=4)
+  stored = legacy.hash("password123")
+
+  verified, new_hash = current.verify_and_update("password123", stored)
+  assert verified
+  assert new_hash.startswith("$argon2id$")
+  assert current.verify_and_update("password123", new_hash) == (True, None)
+
+
+def test_wrong_password_is_not_upgraded():
+  legacy = build_pwd_context(["bcrypt"], bcrypt_rounds=4)
+  current = build_pwd_context(["argon2", "bcrypt"], argon2_memory_cost=1024, argon2_time_cost=1,
+                              argon2_parallelism=1, bcrypt_rounds=4)
+  assert current.verify_and_update("wrong", legacy.hash("password123")) == (False, None)
+
+
+def test_changed_argon2_cost_triggers_rehash():
+  old = build_pwd_context(["argon2"], argon2_memory_cost=1024, argon2_time_cost=1, argon2_parallelism=1)
+  new = build_pwd_context(["argon2"], argon2_memory_cost=2048, argon2_time_cost=1, argon2_parallelism=1)
+  verified, new_hash = new.verify_and_update("pw", old.hash("pw"))
+  assert verified and new_hash is not None
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+from app import health, warmup
+from app.main import app
+
+
+def test_ready_reports_warmup(monkeypatch):
+  monkeypatch.setattr(warmup, "state", warmup.WarmupState())
+  db_check = health.DatabaseCheck("sqlite://")
+  monkeypatch.setattr(health, "db_check", db_check)
+  client = TestClient(app)  # no lifespan, so nothing has warmed up
+  response = client.get("/ready")
+  assert response.status_code == 503
+  assert response.json()["database"]["ok"] is True
+  assert response.json()["warmup"]["done"] is False
+
+  # an exhausted budget skips every step but still finishes
+  warmup.warm_up(budget_seconds=0, top_posts=5)
+  response = client.get("/ready")
+  assert response.status_code == 200
+  assert response.json()["warmup"]["steps"] == {
+    "connections": "skipped", "statements": "skipped", "serializers": "skipped", "top_posts": "skipped"}
+  db_check.close()
@@ -1,10 +1,46 @@
-from passlib.context import CryptContext
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from functools import lru_cache
+
+
+def build_pwd_context(schemes, argon2_memory_cost: int = 19456, argon2_time_cost: int = 2,
+                      argon2_parallelism: int = 1, bcrypt_rounds: int = 12):
+    # The first scheme hashes new passwords; the others are still accepted but
+    # marked deprecated, so verify_and_update() re-hashes them on login. Hashes
+    # made with older cost parameters are flagged for re-hashing too.
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=list(schemes),
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__time_cost=argon2_time_cost,
+        argon2__parallelism=argon2_parallelism,
+        bcrypt__rounds=bcrypt_rounds,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    # passlib (and the hash backends it loads) is imported on the first
+    # hash/verify instead of at startup.
+    from .config import settings
+    return build_pwd_context(
+        [s.strip() for s in settings.password_schemes.split(",") if s.strip()],
+        argon2_memory_cost=settings.argon2_memory_cost,
+        argon2_time_cost=settings.argon2_time_cost,
+        argon2_parallelism=settings.argon2_parallelism,
+        bcrypt_rounds=settings.bcrypt_rounds,
+    )
 
 
 def hash(password: str):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password, hashed_password):
+    """Return (verified, new_hash); new_hash is set when the stored hash
+    uses a deprecated scheme or outdated parameters and should be replaced."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
@@ -0,0 +1,145 @@
+"""Per-worker warm-up run from the app lifespan before traffic arrives.
+
+The first requests on a fresh worker otherwise pay for opening Postgres
+connections, compiling the hot SQLAlchemy statements (they are cached on
+the engine afterwards) and the first pydantic validation of the response
+schemas. warm_up() does that work up front, one step at a time, and skips
+whatever is left once its time budget is spent. The result is kept in
+`state` and reported by GET /ready.
+"""
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from . import models, schemas
+from .database import SessionLocal, get_engine
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class WarmupState:
+    def __init__(self):
+        self.started_at = None
+        self.finished_at = None
+        # step name -> milliseconds taken, "skipped" or "error: ..."
+        self.steps = {}
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def report(self) -> dict:
+        return {
+            "done": self.done,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "steps": dict(self.steps),
+        }
+
+
+state = WarmupState()
+
+
+def _open_connections(count: int):
+    # Check out `count` connections at once so the pool really opens that
+    # many, then hand them all back; they stay idle in the pool.
+    engine = get_engine()
+    if not hasattr(engine.pool, "size"):
+        return  # single-connection pool (SQLite in memory)
+    count = min(count, engine.pool.size())
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def _compile_statements():
+    # Run the read routes' queries once. Parameters are bound, so these hit
+    # the same compiled-statement cache entries real requests use.
+    from . import oauth2
+    from .routers import post
+
+    db = SessionLocal()
+    try:
+        post._list_posts(db, 0, 10, 0, "")
+        post._get_post(db, 0, 0)
+        post._get_posts(db, 0, {0})
+        oauth2.active_user(db, 0)
+        db.query(func.count(models.Vote.post_id)).filter(models.Vote.post_id == 0).scalar()
+    finally:
+        db.close()
+
+
+def _exercise_serializers():
+    from .routers import post
+
+    db = SessionLocal()
+    try:
+        rows = post._list_posts(db, 0, 1, 0, "")
+    finally:
+        db.close()
+    if rows:
+        sample = schemas.PostOut.model_validate(rows[0])
+    else:
+        now = datetime.now(timezone.utc)
+        owner = {"id": 0, "email": "warmup@example.com", "created_at": now}
+        sample = schemas.PostOut.model_validate({
+            "Post": {"id": 0, "title": "", "content": "", "published": True, "created_at": now,
+                     "owner_id": 0, "owner": owner},
+            "votes": 0,
+        })
+    sample.model_dump_json()
+    schemas.PostBatchItem(id=0, found=True, post=sample).model_dump_json()
+
+
+def _prefill_top_posts(limit: int):
+    # There is no application-level post cache; reading the most voted posts
+    # pulls their rows and index pages into Postgres' buffer cache.
+    from .routers import post
+
+    db = SessionLocal()
+    try:
+        top = db.query(models.Vote.post_id).group_by(models.Vote.post_id).order_by(
+            func.count(models.Vote.post_id).desc()).limit(limit).all()
+        ids = {post_id for post_id, in top}
+        if ids:
+            post._get_posts(db, 0, ids)
+    finally:
+        db.close()
+
+
+def warm_up(budget_seconds: float, connections: int = 2, top_posts: int = 0):
+    """Run the warm-up steps until done or `budget_seconds` have passed.
+
+    Errors are recorded and don't stop the remaining steps: a cold worker
+    is still better than one that fails to start.
+    """
+    steps = [
+        ("connections", lambda: _open_connections(connections)),
+        ("statements", _compile_statements),
+        ("serializers", _exercise_serializers),
+    ]
+    if top_posts > 0:
+        steps.append(("top_posts", lambda: _prefill_top_posts(top_posts)))
+
+    state.started_at = datetime.now(timezone.utc)
+    deadline = time.monotonic() + budget_seconds
+    for name, step in steps:
+        if time.monotonic() >= deadline:
+            state.steps[name] = "skipped"
+            continue
+        start = time.perf_counter()
+        try:
+            step()
+            state.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+        except Exception as e:
+            logger.warning("warm-up step %s failed: %s", name, e)
+            state.steps[name] = f"error: {e.__class__.__name__}"
+    state.finished_at = datetime.now(timezone.utc)
+    logger.info("warm-up finished", extra={"steps": state.steps})
+    return state
@@ -0,0 +1,40 @@
+"""Gunicorn worker class, set as `worker_class` in gunicorn.conf.py.
+
+Uvicorn's worker, except that shutdown ends the live vote streams and gives
+up on slow responses before gunicorn's graceful_timeout runs out: uvicorn
+only runs the app's lifespan shutdown (stopping the reaper and the live
+broker, disposing the DB pool) once every open response has finished, and
+a worker still waiting when graceful_timeout expires is SIGKILLed.
+"""
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+# seconds of graceful_timeout kept for the lifespan shutdown
+SHUTDOWN_RESERVE_SECONDS = 5
+
+
+class _Server(Server):
+    async def shutdown(self, sockets=None):
+        from . import live
+
+        live.hub.close()
+        await super().shutdown(sockets)
+
+
+class Worker(UvicornWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # responses still running after this are cancelled
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - SHUTDOWN_RESERVE_SECONDS)
+
+    async def _serve(self):
+        # UvicornWorker._serve with our Server
+        self.config.app = self.wsgi
+        server = _Server(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -0,0 +1,69 @@
+# Shared pytest fixtures.
+#
+# Tests run against SQLite in memory unless TEST_DATABASE_URL points at a
+# real database (e.g. postgresql://postgres:pw@localhost:5432/fastapi_test).
+# The schema is created once per session; each test then runs inside a
+# transaction that is rolled back afterwards, so tests don't see each
+# other's rows and nothing has to be dropped or recreated.
+import os
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import get_db, make_engine
+from app.main import app
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite://")
+
+
+@pytest.fixture(scope="session")
+def engine():
+  engine = make_engine(TEST_DATABASE_URL)
+  models.Base.metadata.create_all(bind=engine)
+  yield engine
+  engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+  connection = engine.connect()
+  transaction = connection.begin()
+  # commits inside the app only release a SAVEPOINT of this transaction
+  db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+  try:
+    yield db
+  finally:
+    db.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def client(session):
+  app.dependency_overrides[get_db] = lambda: session
+  try:
+    yield TestClient(app)
+  finally:
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def login(client):
+  """login(email) registers a user and logs in; returns the token response."""
+  def login(email, password="password123"):
+    client.post("/users/", json={"email": email, "password": password})
+    return client.post("/login", data={"username": email, "password": password}).json()
+  return login
+
+
+@pytest.fixture
+def auth_headers(login):
+  """auth_headers(email) registers a user and returns their Authorization header."""
+  def auth_headers(email):
+    return {"Authorization": f"Bearer {login(email)['access_token']}"}
+  return auth_headers
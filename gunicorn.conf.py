@@ -0,0 +1,66 @@
+# Gunicorn configuration, picked up automatically when gunicorn is started
+# from the repository root (or explicitly with `-c gunicorn.conf.py`).
+#
+# Every value can be overridden from the environment, e.g. WEB_CONCURRENCY=4.
+import os
+
+from app.server import worker_count, db_pool_size, DEFAULT_WORKER_MEMORY_MB, EXTRA_CONNECTIONS_PER_WORKER
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Uvicorn's worker, ending live streams on shutdown (see app/worker.py)
+worker_class = "app.worker.Worker"
+
+# Size the pool from the CPUs and memory actually available to the container.
+workers = int(os.getenv("WEB_CONCURRENCY") or worker_count(
+    worker_memory_mb=int(os.getenv("WORKER_MEMORY_MB", DEFAULT_WORKER_MEMORY_MB))))
+
+# Each worker opens up to DB_POOL_SIZE + DB_MAX_OVERFLOW (5 + 10) pooled
+# database connections plus EXTRA_CONNECTIONS_PER_WORKER of its own. Set
+# DB_MAX_CONNECTIONS to the share of Postgres' max_connections this service
+# may use, and the per-worker pool is derived from it and the worker count.
+# This runs before the app (and its settings) is imported.
+if os.getenv("DB_MAX_CONNECTIONS"):
+    _pool_size, _max_overflow = db_pool_size(int(os.environ["DB_MAX_CONNECTIONS"]), workers)
+    os.environ.setdefault("DB_POOL_SIZE", str(_pool_size))
+    os.environ.setdefault("DB_MAX_OVERFLOW", str(_max_overflow))
+
+# Import the app once in the master so workers share its memory copy-on-write.
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+
+# Recycle workers after a number of requests (jittered so they don't all
+# restart together) to bound slow memory growth.
+max_requests = int(os.getenv("MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "100"))
+
+# On SIGTERM/recycle workers stop accepting, finish in-flight requests and run
+# the app's lifespan shutdown (which disposes the DB pool) within this window.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-"
+
+
+def when_ready(server):
+    from app import live
+    from app.config import settings
+
+    if workers > 1 and live.broker_name(settings.live_broker) == "local":
+        server.log.warning("LIVE_BROKER is local with %d workers: live vote streams only see votes "
+                           "cast on their own worker; use LIVE_BROKER=postgres", workers)
+    if workers > 1 and settings.idempotency_backend == "memory":
+        server.log.warning("IDEMPOTENCY_BACKEND is memory with %d workers: retries that land on "
+                           "another worker run again; use IDEMPOTENCY_BACKEND=database", workers)
+    server.log.info("up to %d database connections: %d workers x (%d pooled + %d overflow + %d)",
+                    workers * (settings.db_pool_size + settings.db_max_overflow + EXTRA_CONNECTIONS_PER_WORKER),
+                    workers, settings.db_pool_size, settings.db_max_overflow, EXTRA_CONNECTIONS_PER_WORKER)
+
+
+def post_fork(server, worker):
+    # A pool created in the master before forking must not be shared: drop the
+    # inherited connections without closing them (the parent still owns them).
+    from app import database
+
+    engine = database.current_engine()
+    if engine is not None:
+        engine.dispose(close=False)
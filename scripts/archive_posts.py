@@ -0,0 +1,40 @@
+"""Partition maintenance job for posts.
+
+Creates upcoming monthly partitions and rewrites cold ones into compressed
+archive partitions. Safe to run repeatedly (e.g. daily from cron or a
+Render cron job):
+
+    python scripts/archive_posts.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings  # noqa: E402
+from app.database import get_engine  # noqa: E402
+from app.partitions import archive_post_partitions, ensure_post_partitions, list_post_partitions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only list partitions")
+    args = parser.parse_args()
+
+    with get_engine().connect() as conn:
+        if args.dry_run:
+            for name, month, archived in list_post_partitions(conn):
+                print(f"{name:<28} {month} {'archived' if archived else ''}")
+            return
+
+        created = ensure_post_partitions(conn, months_ahead=settings.partition_months_ahead)
+        print(f"created partitions: {', '.join(created) or 'none'}")
+        archived = archive_post_partitions(conn, older_than_days=settings.archive_after_days,
+                                           compression=settings.archive_compression,
+                                           tablespace=settings.archive_tablespace)
+        print(f"archived partitions: {', '.join(archived) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
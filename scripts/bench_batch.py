@@ -0,0 +1,93 @@
+"""Benchmark GET /posts/batch against N individual GET /posts/{id} calls.
+
+Seeds a user and --posts posts (with a few votes each) in the configured
+database, then times fetching --ids of them both ways through the ASGI app
+and counts the SQL statements issued. Seeded rows are removed afterwards.
+Run from the repository root:
+
+    python scripts/bench_batch.py [--ids 50] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import models, oauth2  # noqa: E402
+from app.database import SessionLocal, get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def seed(posts: int, voters: int):
+    db = SessionLocal(bind=get_engine())
+    users = [models.User(email=f"bench-{uuid.uuid4().hex[:12]}@example.com", password="x") for _ in range(voters)]
+    db.add_all(users)
+    db.flush()
+    rows = [models.Post(title=f"bench {i}", content="lorem ipsum " * 50, owner_id=users[i % voters].id)
+            for i in range(posts)]
+    db.add_all(rows)
+    db.flush()
+    db.add_all([models.Vote(user_id=u.id, post_id=p.id) for p in rows for u in users[:3]])
+    db.commit()
+    ids = [p.id for p in rows]
+    user_ids = [u.id for u in users]
+    db.close()
+    return user_ids, ids
+
+
+def cleanup(user_ids, post_ids):
+    db = SessionLocal(bind=get_engine())
+    db.query(models.Vote).filter(models.Vote.post_id.in_(post_ids)).delete(synchronize_session=False)
+    db.query(models.Post).filter(models.Post.id.in_(post_ids)).delete(synchronize_session=False)
+    db.query(models.User).filter(models.User.id.in_(user_ids)).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--ids", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    statements = [0]
+    event.listen(get_engine(), "before_cursor_execute", lambda *a, **k: statements.__setitem__(0, statements[0] + 1))
+
+    user_ids, post_ids = seed(args.posts, voters=5)
+    try:
+        token = oauth2.create_access_token(data={"user_id": user_ids[0]})
+        headers = {"Authorization": f"Bearer {token}"}
+        wanted = post_ids[:args.ids]
+        client = TestClient(app)
+
+        def individual():
+            for i in wanted:
+                client.get(f"/posts/{i}", headers=headers)
+
+        def batch():
+            client.get("/posts/batch", params={"ids": ",".join(map(str, wanted))}, headers=headers)
+
+        print(f"fetching {len(wanted)} posts")
+        for name, fn in (("individual", individual), ("batch", batch)):
+            fn()
+            statements[0] = 0
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - start)
+            print(f"{name:<11} {statistics.median(timings) * 1000:>9.2f} ms  "
+                  f"{statements[0] / args.repeat:>6.0f} SQL statements")
+    finally:
+        cleanup(user_ids, post_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark response compression on realistic post feed payloads.
+
+Reports, per encoding and level, the CPU time spent compressing one feed
+page against the bytes saved. Run from the repository root:
+
+    python scripts/bench_compression.py [--posts 10] [--content-size 2000]
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.compression import available_encodings, compress  # noqa: E402
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 6, 11],
+    "zstd": [1, 3, 9, 19],
+}
+
+WORDS = ["the", "post", "vote", "user", "social", "fastapi", "backend", "feed",
+         "today", "great", "thanks", "for", "sharing", "this", "really", "nice"]
+
+
+def make_feed(posts: int, content_size: int) -> bytes:
+    # Shape matches schemas.PostOut as returned by GET /posts
+    rng = random.Random(42)
+    feed = []
+    for i in range(posts):
+        words = []
+        while sum(len(w) + 1 for w in words) < content_size:
+            words.append(rng.choice(WORDS) if rng.random() < 0.8
+                         else "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))))
+        feed.append({
+            "Post": {
+                "title": f"Post number {i}",
+                "content": " ".join(words),
+                "published": True,
+                "id": i + 1,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "owner_id": rng.randint(1, 1000),
+                "owner": {
+                    "id": rng.randint(1, 1000),
+                    "email": f"user{rng.randint(1, 1000)}@example.com",
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                },
+            },
+            "votes": rng.randint(0, 5000),
+        })
+    return json.dumps(feed).encode("utf-8")
+
+
+def bench(payload: bytes, encoding: str, level: int, iterations: int):
+    start = time.process_time()
+    for _ in range(iterations):
+        out = compress(payload, encoding, level)
+    elapsed = (time.process_time() - start) / iterations
+    return elapsed, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10)
+    parser.add_argument("--content-size", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = make_feed(args.posts, args.content_size)
+    print(f"payload: {len(payload)} bytes ({args.posts} posts, ~{args.content_size} chars each)")
+    print(f"{'encoding':<8} {'level':>5} {'size':>8} {'ratio':>7} {'saved':>8} {'cpu/op':>10} {'MB/s':>8}")
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            cpu, size = bench(payload, encoding, level, args.iterations)
+            print(f"{encoding:<8} {level:>5} {size:>8} {len(payload) / size:>7.2f} "
+                  f"{len(payload) - size:>8} {cpu * 1e6:>8.1f}us {len(payload) / cpu / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark posts/votes queries on unpartitioned vs partitioned tables.
+
+Seeds two schemas in the configured database with the same synthetic data
+(posts spread over --months months, several votes per post), one laid out
+like the tables before the 5f2c8e1d9a47 migration and one like after, then
+reports median latency of the read routes' queries. The schemas are dropped
+afterwards unless --keep is given. Run from the repository root:
+
+    python scripts/bench_partitioning.py [--posts 1000000] [--months 36]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import get_engine  # noqa: E402
+
+VOTE_PARTITIONS = 16
+
+QUERIES = {
+    # GET /posts as implemented today (no ordering, no time filter)
+    "get_posts": """
+        SELECT p.*, count(v.post_id) AS votes FROM posts p
+        LEFT JOIN votes v ON v.post_id = p.id
+        WHERE p.title LIKE '%' || :search || '%'
+        GROUP BY p.id, p.created_at LIMIT 10 OFFSET :skip
+    """,
+    # recent feed page: partition pruning applies
+    "recent_feed": """
+        SELECT p.*, count(v.post_id) AS votes FROM posts p
+        LEFT JOIN votes v ON v.post_id = p.id
+        WHERE p.created_at >= now() - interval '30 days'
+        GROUP BY p.id, p.created_at ORDER BY p.created_at DESC LIMIT 10
+    """,
+    # GET /posts/{id}: no pruning on id, one index probe per partition
+    "get_post": """
+        SELECT p.*, count(v.post_id) AS votes FROM posts p
+        LEFT JOIN votes v ON v.post_id = p.id
+        WHERE p.id = :id GROUP BY p.id, p.created_at
+    """,
+    "vote_count": "SELECT count(*) FROM votes WHERE post_id = :id",
+}
+
+
+def setup(conn, schema: str, partitioned: bool, posts: int, months: int, votes_per_post: int):
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {schema}"))
+    conn.execute(text(f"SET search_path TO {schema}"))
+    if partitioned:
+        conn.execute(text("""
+            CREATE TABLE posts (id int NOT NULL, title varchar NOT NULL, content varchar NOT NULL,
+                owner_id int NOT NULL, published boolean NOT NULL DEFAULT TRUE,
+                created_at timestamptz NOT NULL, PRIMARY KEY (id, created_at))
+            PARTITION BY RANGE (created_at)"""))
+        for m in range(months + 1):
+            conn.execute(text(f"""
+                CREATE TABLE posts_m{m} PARTITION OF posts FOR VALUES
+                FROM (date_trunc('month', now()) - interval '{m} months')
+                TO (date_trunc('month', now()) - interval '{m - 1} months')"""))
+        conn.execute(text("""
+            CREATE TABLE votes (user_id int NOT NULL, post_id int NOT NULL, PRIMARY KEY (user_id, post_id))
+            PARTITION BY HASH (post_id)"""))
+        for r in range(VOTE_PARTITIONS):
+            conn.execute(text(f"CREATE TABLE votes_p{r} PARTITION OF votes "
+                              f"FOR VALUES WITH (MODULUS {VOTE_PARTITIONS}, REMAINDER {r})"))
+    else:
+        conn.execute(text("""
+            CREATE TABLE posts (id int PRIMARY KEY, title varchar NOT NULL, content varchar NOT NULL,
+                owner_id int NOT NULL, published boolean NOT NULL DEFAULT TRUE,
+                created_at timestamptz NOT NULL)"""))
+        conn.execute(text("""
+            CREATE TABLE votes (user_id int NOT NULL, post_id int NOT NULL REFERENCES posts (id),
+                PRIMARY KEY (user_id, post_id))"""))
+    conn.execute(text(f"""
+        INSERT INTO posts (id, title, content, owner_id, created_at)
+        SELECT i, 'post ' || i, repeat('lorem ipsum ', 20), i % 1000,
+               now() - (random() * interval '{months} months')
+        FROM generate_series(1, {posts}) i"""))
+    conn.execute(text(f"""
+        INSERT INTO votes (user_id, post_id)
+        SELECT u, i FROM generate_series(1, {posts}) i, generate_series(1, {votes_per_post}) u"""))
+    conn.execute(text("CREATE INDEX ON posts (created_at)"))
+    conn.execute(text("CREATE INDEX ON votes (post_id)"))
+    conn.commit()
+    conn.execute(text("VACUUM ANALYZE posts"))
+    conn.execute(text("VACUUM ANALYZE votes"))
+
+
+def bench(conn, schema: str, repeat: int, posts: int):
+    conn.execute(text(f"SET search_path TO {schema}"))
+    results = {}
+    for name, sql in QUERIES.items():
+        timings = []
+        for i in range(repeat):
+            params = {"search": "", "skip": 0, "id": (i * 7919) % posts + 1}
+            start = time.perf_counter()
+            conn.execute(text(sql), params).all()
+            timings.append(time.perf_counter() - start)
+        results[name] = statistics.median(timings) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--votes-per-post", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="keep the bench schemas")
+    args = parser.parse_args()
+
+    engine = get_engine().execution_options(isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        results = {}
+        for schema, partitioned in (("bench_plain", False), ("bench_partitioned", True)):
+            start = time.perf_counter()
+            setup(conn, schema, partitioned, args.posts, args.months, args.votes_per_post)
+            print(f"seeded {schema} in {time.perf_counter() - start:.1f}s")
+            results[schema] = bench(conn, schema, args.repeat, args.posts)
+
+        print(f"\n{'query':<14} {'plain ms':>10} {'partitioned ms':>15}")
+        for name in QUERIES:
+            print(f"{name:<14} {results['bench_plain'][name]:>10.2f} {results['bench_partitioned'][name]:>15.2f}")
+
+        if not args.keep:
+            conn.execute(text("DROP SCHEMA bench_plain CASCADE"))
+            conn.execute(text("DROP SCHEMA bench_partitioned CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark password hashing schemes and cost parameters.
+
+For each scheme/parameter set, hashes a password repeatedly in a fresh
+subprocess and reports hashes per second (one core) and the peak resident
+memory added by hashing. Use it to pick PASSWORD_SCHEMES / ARGON2_* /
+BCRYPT_ROUNDS for your hardware. Run from the repository root:
+
+    python scripts/bench_password_hash.py [--seconds 2]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONFIGS = [
+    ("bcrypt", {"bcrypt_rounds": 10}),
+    ("bcrypt", {"bcrypt_rounds": 12}),
+    ("bcrypt", {"bcrypt_rounds": 14}),
+    ("argon2", {"argon2_memory_cost": 19456, "argon2_time_cost": 2, "argon2_parallelism": 1}),
+    ("argon2", {"argon2_memory_cost": 65536, "argon2_time_cost": 3, "argon2_parallelism": 4}),
+    ("argon2", {"argon2_memory_cost": 131072, "argon2_time_cost": 2, "argon2_parallelism": 4}),
+    ("argon2", {"argon2_memory_cost": 262144, "argon2_time_cost": 1, "argon2_parallelism": 4}),
+]
+
+
+def worker(scheme: str, params: dict, seconds: float):
+    from app.utils import build_pwd_context
+
+    context = build_pwd_context([scheme], **params)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        context.hash("correct horse battery staple")
+        count += 1
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"rate": count / elapsed, "peak_kib": peak, "added_kib": peak - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], json.loads(args.worker[1]), args.seconds)
+        return
+
+    print(f"{'scheme':<8} {'parameters':<72} {'hashes/s':>9} {'peak MiB':>9} {'hash MiB':>9}")
+    for scheme, params in CONFIGS:
+        out = subprocess.run([sys.executable, __file__, "--seconds", str(args.seconds),
+                              "--worker", scheme, json.dumps(params)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out)
+        described = ", ".join(f"{k}={v}" for k, v in params.items())
+        print(f"{scheme:<8} {described:<72} {result['rate']:>9.1f} "
+              f"{result['peak_kib'] / 1024:>9.1f} {result['added_kib'] / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
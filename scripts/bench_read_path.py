@@ -0,0 +1,144 @@
+"""Benchmark the Core read path of the post routes against the ORM queries.
+
+Seeds a user and --posts posts (with a few votes each) in the configured
+database, then times the list, single and batch reads both ways, each
+followed by the response validation and JSON encoding FastAPI does. The
+HTTP layer is left out so the difference is the per-request Python cost.
+Also checks that both paths produce identical JSON. Seeded rows are
+removed afterwards. Run from the repository root:
+
+    python scripts/bench_read_path.py [--posts 200] [--limit 10] [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import event, func  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.database import SessionLocal, get_engine  # noqa: E402
+from app.routers.post import _get_post, _get_posts, _list_posts  # noqa: E402
+
+
+def seed(posts: int, voters: int):
+    db = SessionLocal(bind=get_engine())
+    users = [models.User(email=f"bench-{uuid.uuid4().hex[:12]}@example.com", password="x") for _ in range(voters)]
+    db.add_all(users)
+    db.flush()
+    rows = [models.Post(title=f"bench {i}", content="lorem ipsum " * 50, owner_id=users[i % voters].id)
+            for i in range(posts)]
+    db.add_all(rows)
+    db.flush()
+    db.add_all([models.Vote(user_id=u.id, post_id=p.id) for p in rows for u in users[:3]])
+    db.commit()
+    ids = [p.id for p in rows]
+    user_ids = [u.id for u in users]
+    db.close()
+    return user_ids, ids
+
+
+def cleanup(user_ids, post_ids):
+    db = SessionLocal(bind=get_engine())
+    db.query(models.Vote).filter(models.Vote.post_id.in_(post_ids)).delete(synchronize_session=False)
+    db.query(models.Post).filter(models.Post.id.in_(post_ids)).delete(synchronize_session=False)
+    db.query(models.User).filter(models.User.id.in_(user_ids)).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def voted_by(user_id: int):
+    # Filtered aggregate over the votes already joined for the count, so the
+    # flag costs no extra query or join.
+    return (func.count(models.Vote.post_id).filter(models.Vote.user_id == user_id) > 0).label("voted_by_me")
+
+
+# The ORM queries the routes used before the Core path.
+def _orm_query(db, user_id):
+    return db.query(models.Post, func.count(models.Vote.post_id).label("votes"), voted_by(user_id)).join(
+        models.Vote, models.Vote.post_id == models.Post.id, isouter=True).group_by(
+        models.Post.id, models.Post.created_at)
+
+
+def orm_list(db, user_id, limit, search):
+    return _orm_query(db, user_id).filter(models.Post.title.contains(search)).limit(limit).offset(0).all()
+
+
+def orm_get(db, user_id, id):
+    return _orm_query(db, user_id).options(selectinload(models.Post.owner)).filter(models.Post.id == id).first()
+
+
+def orm_batch(db, user_id, ids):
+    rows = _orm_query(db, user_id).options(selectinload(models.Post.owner)).filter(models.Post.id.in_(ids)).all()
+    return {row.Post.id: row for row in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    statements = [0]
+    event.listen(get_engine(), "before_cursor_execute", lambda *a, **k: statements.__setitem__(0, statements[0] + 1))
+
+    many = TypeAdapter(List[schemas.PostOut])
+    one = TypeAdapter(schemas.PostOut)
+    user_ids, post_ids = seed(args.posts, voters=5)
+    try:
+        viewer = user_ids[0]
+        wanted = post_ids[:args.limit]
+        search = "bench"
+
+        def ordered(by_id):
+            return [by_id[i] for i in wanted]
+
+        cases = [
+            ("list", lambda db: many.dump_json(many.validate_python(orm_list(db, viewer, args.limit, search))),
+             lambda db: many.dump_json(many.validate_python(_list_posts(db, viewer, args.limit, 0, search)))),
+            ("single", lambda db: one.dump_json(one.validate_python(orm_get(db, viewer, wanted[0]))),
+             lambda db: one.dump_json(one.validate_python(_get_post(db, viewer, wanted[0])))),
+            ("batch", lambda db: many.dump_json(many.validate_python(ordered(orm_batch(db, viewer, set(wanted))))),
+             lambda db: many.dump_json(many.validate_python(ordered(_get_posts(db, viewer, set(wanted)))))),
+        ]
+
+        print(f"{'route':<7} {'path':<5} {'median':>10} {'SQL/req':>8}")
+        for name, orm_fn, core_fn in cases:
+            outputs = {}
+            for path, fn in (("orm", orm_fn), ("core", core_fn)):
+                timings = []
+                statements[0] = 0
+                for _ in range(args.repeat):
+                    # a fresh session per call, like get_db
+                    db = SessionLocal()
+                    start = time.perf_counter()
+                    outputs[path] = fn(db)
+                    timings.append(time.perf_counter() - start)
+                    db.close()
+                print(f"{name:<7} {path:<5} {statistics.median(timings) * 1000:>8.3f}ms "
+                      f"{statements[0] / args.repeat:>8.1f}")
+            if name != "list" and outputs["orm"] != outputs["core"]:
+                raise SystemExit(f"{name}: ORM and Core output differ")
+        # without ORDER BY the two list queries may legitimately return rows in
+        # different orders; compare them as sets
+        db = SessionLocal()
+        orm_rows = {r.model_dump_json() for r in many.validate_python(orm_list(db, viewer, args.posts, search))}
+        core_rows = {r.model_dump_json() for r in many.validate_python(_list_posts(db, viewer, args.posts, 0, search))}
+        db.close()
+        if orm_rows != core_rows:
+            raise SystemExit("list: ORM and Core output differ")
+        print("outputs identical")
+    finally:
+        cleanup(user_ids, post_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark GET /users/{id}/stats for a user with many posts.
+
+Seeds one user with --posts posts spread over the last two years (each
+voted on by --voters other users), rebuilds the counters, then compares
+the endpoint's latency with computing the same numbers by aggregating
+posts and votes on the fly. Seeded rows are removed afterwards. Run from
+the repository root:
+
+    python scripts/bench_user_stats.py [--posts 100000] [--voters 3] [--repeat 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.database import get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.stats import rebuild_user_stats  # noqa: E402
+
+
+def seed(conn, posts: int, voters: int):
+    user_ids = []
+    for _ in range(voters + 1):
+        user_ids.append(conn.execute(text("INSERT INTO users (email, password) VALUES (:e, 'x') RETURNING id"),
+                                     {"e": f"bench-{uuid.uuid4().hex[:12]}@example.com"}).scalar())
+    owner = user_ids[0]
+    conn.execute(text("""
+        INSERT INTO posts (title, content, owner_id, created_at)
+        SELECT 'bench ' || g, 'lorem ipsum dolor sit amet', :owner, now() - (g % 730) * interval '1 day'
+        FROM generate_series(1, :n) g
+    """), {"owner": owner, "n": posts})
+    conn.execute(text("""
+        INSERT INTO votes (user_id, post_id)
+        SELECT u.id, p.id FROM posts p CROSS JOIN users u
+        WHERE p.owner_id = :owner AND u.id = ANY(:voters)
+    """), {"owner": owner, "voters": user_ids[1:]})
+    conn.commit()
+    conn.execute(text("ANALYZE posts"))
+    conn.execute(text("ANALYZE votes"))
+    conn.commit()
+    return user_ids
+
+
+def cleanup(conn, user_ids):
+    conn.execute(text("DELETE FROM votes WHERE post_id IN (SELECT id FROM posts WHERE owner_id = :owner)"),
+                 {"owner": user_ids[0]})
+    conn.execute(text("DELETE FROM users WHERE id = ANY(:ids)"), {"ids": user_ids})
+    conn.commit()
+
+
+def timed(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, max(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--voters", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with get_engine().connect() as conn:
+        start = time.perf_counter()
+        user_ids = seed(conn, args.posts, args.voters)
+        print(f"seeded {args.posts} posts and {args.posts * args.voters} votes "
+              f"in {time.perf_counter() - start:.1f}s")
+        try:
+            start = time.perf_counter()
+            rebuild_user_stats(conn)
+            print(f"rebuild_user_stats: {time.perf_counter() - start:.2f}s")
+
+            owner = user_ids[0]
+            client = TestClient(app)
+            stats = client.get(f"/users/{owner}/stats").json()
+            assert stats["post_count"] == args.posts, stats
+            assert stats["votes_received"] == args.posts * args.voters, stats
+
+            def on_the_fly():
+                conn.execute(text("SELECT count(*) FROM posts WHERE owner_id = :o"), {"o": owner}).scalar()
+                conn.execute(text("SELECT count(*) FROM votes JOIN posts ON posts.id = votes.post_id "
+                                  "WHERE posts.owner_id = :o"), {"o": owner}).scalar()
+                conn.rollback()
+
+            for name, fn in (("GET /users/{id}/stats", lambda: client.get(f"/users/{owner}/stats")),
+                             ("aggregate queries", on_the_fly)):
+                median, worst = timed(fn, args.repeat)
+                print(f"{name:<22} median {median:>9.2f} ms  max {worst:>9.2f} ms")
+        finally:
+            cleanup(conn, user_ids)
+
+
+if __name__ == "__main__":
+    main()
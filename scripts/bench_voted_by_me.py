@@ -0,0 +1,69 @@
+"""Benchmark the get_posts page query with and without the voted_by_me flag.
+
+Seeds --posts posts with --votes-per-post votes each in the configured
+database, runs the route's LIST_POSTS statement as is and without its
+voted_by_me column, and reports median latency.
+Seeded rows are removed afterwards. Run from the repository root:
+
+    python scripts/bench_voted_by_me.py [--posts 20000] [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, get_engine  # noqa: E402
+from app.routers.post import LIST_POSTS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--votes-per-post", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal(bind=get_engine())
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    users = [models.User(email=f"{prefix}-{i}@example.com", password="x") for i in range(args.votes_per_post)]
+    db.add_all(users)
+    db.flush()
+    user_ids = [u.id for u in users]
+    post_ids = db.execute(insert(models.Post).returning(models.Post.id), [
+        {"title": f"{prefix} {i}", "content": "lorem ipsum " * 20, "owner_id": user_ids[i % len(user_ids)]}
+        for i in range(args.posts)]).scalars().all()
+    db.execute(insert(models.Vote), [{"user_id": u, "post_id": p} for p in post_ids for u in user_ids])
+    db.commit()
+
+    try:
+        viewer = user_ids[0]
+        base = LIST_POSTS.with_only_columns(*(c for c in LIST_POSTS.selected_columns if c.name != "voted_by_me"))
+        results = {}
+        for name, statement in (("votes only", base), ("votes + voted_by_me", LIST_POSTS)):
+            timings = []
+            for i in range(args.repeat):
+                params = {"user_id": viewer, "search": prefix, "limit": 10, "skip": (i * 10) % args.posts}
+                start = time.perf_counter()
+                db.execute(statement, params).all()
+                timings.append(time.perf_counter() - start)
+            results[name] = statistics.median(timings) * 1000
+        for name, ms in results.items():
+            print(f"{name:<22} {ms:>8.3f} ms / page")
+    finally:
+        db.rollback()
+        db.query(models.Vote).filter(models.Vote.post_id.in_(post_ids)).delete(synchronize_session=False)
+        db.query(models.Post).filter(models.Post.id.in_(post_ids)).delete(synchronize_session=False)
+        db.query(models.User).filter(models.User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Purge soft-deleted posts and users (their votes, bodies and posts) now.
+
+Every worker already does this in the background unless
+REAPER_INTERVAL_SECONDS=0; with it off, run this from cron instead:
+
+    python scripts/reap_deleted.py [--batch-size 1000] [--grace-seconds 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import get_engine  # noqa: E402
+from app.reaper import reap  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="votes per transaction")
+    parser.add_argument("--grace-seconds", type=int, default=0, help="only purge rows deleted longer ago")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    purged = 0
+    with get_engine().connect() as conn:
+        # reap() handles a bounded number of rows per pass
+        while True:
+            done = reap(conn, batch_size=args.batch_size, grace_seconds=args.grace_seconds)
+            if not done:
+                break
+            purged += done
+    print(f"purged {purged} deleted posts and users in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Recompute the user_stats counters from posts and votes.
+
+The routes keep the counters current; run this after bulk imports or
+manual data fixes, or periodically (e.g. weekly from cron) as a safety net:
+
+    python scripts/rebuild_user_stats.py [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import get_engine  # noqa: E402
+from app.stats import rebuild_user_stats  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="users per transaction")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with get_engine().connect() as conn:
+        rebuilt = rebuild_user_stats(conn, batch_size=args.batch_size)
+    print(f"rebuilt stats for {rebuilt} users in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()